@@ -13,6 +13,10 @@ from .types import IndexDocument, SearchHit, SearchRequest, SearchResponse
 
 PROVIDER_REQUEST_TIMEOUT = 2
 
+# bulk はこの単位で送信するので、保持するドキュメントはチャンク分だけで済む
+BULK_CHUNK_SIZE = 500
+BULK_MAX_CHUNK_BYTES = 10 * 1024 * 1024
+
 
 class SearchBackendProtocol:
     def search(self, request: SearchRequest) -> SearchResponse:
@@ -21,6 +25,9 @@ class SearchBackendProtocol:
     def index_documents(self, documents: Iterable[IndexDocument]) -> None:
         raise NotImplementedError
 
+    def rebuild_index(self, documents: Iterable[IndexDocument]) -> None:
+        raise NotImplementedError
+
     def delete_index(self) -> None:
         raise NotImplementedError
 
@@ -41,14 +48,50 @@ class OpenSearchBackend(SearchBackendProtocol):
         self.client.indices.create(index=self.index_name, body=get_index_definition())
 
     def delete_index(self) -> None:
-        if self.client.indices.exists(index=self.index_name):
-            self.client.indices.delete(index=self.index_name)
+        # rebuild_index のあとは index_name がエイリアスなので、裏の実体ごと消す
+        names = self._concrete_indices()
+        if names:
+            self.client.indices.delete(index=",".join(names))
 
     def index_documents(self, documents: Iterable[IndexDocument]) -> None:
+        self._bulk_index(documents, self.index_name)
+
+    def rebuild_index(self, documents: Iterable[IndexDocument]) -> None:
+        # 新しいインデックスへ流し込み、最後まで送れてから index_name のエイリアスを付け替える。
+        # 途中で失敗しても検索は元のインデックスを見続け、ドキュメントを全件抱える必要もない
+        target = f"{self.index_name}-{time.time_ns()}"
+        self.client.indices.create(index=target, body=get_index_definition())
+        try:
+            self._bulk_index(documents, target)
+        except BaseException:
+            self.client.indices.delete(index=target)
+            raise
+
+        previous = self._concrete_indices()
+        actions: list[dict[str, object]] = []
+        for name in previous:
+            if name == self.index_name:
+                # エイリアス導入前の実体インデックスは、付け替えと同じ操作で消す
+                actions.append({"remove_index": {"index": name}})
+            else:
+                actions.append({"remove": {"index": name, "alias": self.index_name}})
+        actions.append({"add": {"index": target, "alias": self.index_name}})
+        self.client.indices.update_aliases(body={"actions": actions})
+
+        stale = [name for name in previous if name != self.index_name]
+        if stale:
+            self.client.indices.delete(index=",".join(stale))
+
+    def _concrete_indices(self) -> list[str]:
+        if not self.client.indices.exists(index=self.index_name):
+            return []
+        return list(self.client.indices.get(index=self.index_name))
+
+    def _bulk_index(self, documents: Iterable[IndexDocument], index: str) -> None:
         actions = (
             {
                 "_op_type": "index",
-                "_index": self.index_name,
+                "_index": index,
                 "_id": doc.file_id,
                 "file_id": doc.file_id,
                 "path": doc.path,
@@ -61,7 +104,12 @@ class OpenSearchBackend(SearchBackendProtocol):
             }
             for doc in documents
         )
-        helpers.bulk(self.client, actions)
+        helpers.bulk(
+            self.client,
+            actions,
+            chunk_size=BULK_CHUNK_SIZE,
+            max_chunk_bytes=BULK_MAX_CHUNK_BYTES,
+        )
 
     def search(self, request: SearchRequest) -> SearchResponse:
         query = opensearch_client.build_search_body(request)
@@ -85,7 +133,7 @@ class OpenSearchBackend(SearchBackendProtocol):
             else max(offset // request.size + 1, 1)
         )
         return SearchResponse(
-            hits=hits,
+            hits=tuple(hits),
             total=total,
             took_provider_ms=took_ms,
             page=page,
@@ -108,6 +156,9 @@ class InMemorySearchBackend(SearchBackendProtocol):
         for doc in documents:
             self._documents[doc.file_id] = doc
 
+    def rebuild_index(self, documents: Iterable[IndexDocument]) -> None:
+        self._documents = {doc.file_id: doc for doc in documents}
+
     def search(self, request: SearchRequest) -> SearchResponse:
         start_time = time.monotonic()
         matches: list[SearchHit] = []
@@ -148,7 +199,7 @@ class InMemorySearchBackend(SearchBackendProtocol):
             else max(offset // request.size + 1, 1)
         )
         return SearchResponse(
-            hits=slice_hits,
+            hits=tuple(slice_hits),
             total=len(matches),
             took_provider_ms=took_ms,
             page=page,
@@ -198,7 +249,7 @@ def _process_hits(
             lines = content.splitlines()
             head = lines[: max(1, _snippet_lines())]
             snippet_text = "\n".join(head)
-            blocks = []
+            blocks = ()
             match_line = 1  # 先頭行扱い
 
         line_offsets = source.get("line_offsets")
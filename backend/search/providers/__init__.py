@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 from collections.abc import Callable
+from functools import cache
 
 from ..types import SearchRequest, SearchResponse
 from .opensearch import search as _opensearch
@@ -9,8 +10,15 @@ from .zoekt import search as _zoekt
 
 SearchProvider = Callable[[SearchRequest], SearchResponse]
 
+_PROVIDERS: dict[str, SearchProvider] = {
+    "opensearch": _opensearch,
+    "zoekt": _zoekt,
+}
 
+
+@cache
 def get_provider_name(name: str | None = None) -> str:
+    # 環境変数はプロセス起動時に固定されるので、リクエスト毎の読み直しを避ける
     provider_name = (
         (name or os.environ.get("SEARCH_PROVIDER", "opensearch")).strip().lower()
     )
@@ -20,8 +28,7 @@ def get_provider_name(name: str | None = None) -> str:
 
 
 def get_provider(name: str) -> SearchProvider:
-    if name == "opensearch":
-        return _opensearch
-    if name == "zoekt":
-        return _zoekt
-    raise ValueError(f"Unknown provider: {name}")
+    try:
+        return _PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown provider: {name}") from None
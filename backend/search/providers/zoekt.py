@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-import json
 import os
 import time
 from collections.abc import Sequence
+from functools import lru_cache
 from urllib import parse, request as urllib_request
 
+import orjson
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 
@@ -24,8 +25,10 @@ def search(request: SearchRequest) -> SearchResponse:
     start = time.monotonic()
 
     offset = _resolve_offset(request)
-    payload = _build_query_payload(request, offset)
-    data = _http_post(search_url, payload)
+    body = _encode_query_payload(
+        decode_literal_query(request.query), request.size, offset
+    )
+    data = _http_post(search_url, body)
     stats: dict[str, object] = data.get("Stats", {}) or {}
     file_matches: Sequence[dict[str, object]] = data.get("FileMatches", []) or []
     hits = _process_file_matches(base_url, file_matches, request)
@@ -37,7 +40,7 @@ def search(request: SearchRequest) -> SearchResponse:
         request.page if request.cursor is None else max(offset // request.size + 1, 1)
     )
     return SearchResponse(
-        hits=hits,
+        hits=tuple(hits),
         total=total,
         took_provider_ms=took_ms,
         page=page,
@@ -46,9 +49,13 @@ def search(request: SearchRequest) -> SearchResponse:
     )
 
 
-def _build_query_payload(request: SearchRequest, offset: int) -> dict[str, object]:
-    literal = decode_literal_query(request.query)
-    size = request.size
+@lru_cache(maxsize=256)
+def _encode_query_payload(literal: str, size: int, offset: int) -> bytes:
+    # 同じクエリ・ページなら送信するバイト列も同じなので、エンコード結果を使い回す
+    return orjson.dumps(_build_query_payload(literal, size, offset))
+
+
+def _build_query_payload(literal: str, size: int, offset: int) -> dict[str, object]:
     query: dict[str, object] = {
         "query": {
             "type": "substring",
@@ -193,20 +200,19 @@ def _extract_total(stats: dict[str, object], fallback: int) -> int:
 
 
 def _http_post(
-    url: str, payload: dict[str, object], *, timeout: float = DEFAULT_TIMEOUT
+    url: str, body: bytes, *, timeout: float = DEFAULT_TIMEOUT
 ) -> dict[str, object]:
-    data = json.dumps(payload).encode("utf-8")
     request_obj = urllib_request.Request(
         url,
-        data=data,
+        data=body,
         headers={"Content-Type": "application/json"},
         method="POST",
     )
     with urllib_request.urlopen(request_obj, timeout=timeout) as response:
-        body = response.read()
-    if not body:
+        raw = response.read()
+    if not raw:
         return {}
-    return json.loads(body.decode("utf-8"))
+    return orjson.loads(raw)
 
 
 def _http_get(
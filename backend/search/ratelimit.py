@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import threading
 import time
+import weakref
 from collections.abc import Callable
 from functools import wraps
 from typing import Any
 
+from django.conf import settings
 from django.core.cache import cache
 from django.http import JsonResponse
 
@@ -15,6 +18,11 @@ _PERIOD_SECONDS = {
     "d": 60 * 60 * 24,
 }
 
+# 保持するバケット数の上限。超えたら満タンに戻ったキーだけを捨てる
+_LOCAL_MAX_KEYS = 10_000
+
+_local_limiters: weakref.WeakSet[InProcRateLimiter] = weakref.WeakSet()
+
 
 def ratelimit(
     key: str, rate: str, block: bool = False
@@ -24,7 +32,7 @@ def ratelimit(
     def decorator(view_func: Callable[..., Any]) -> Callable[..., Any]:
         @wraps(view_func)
         def wrapped(request, *args, **kwargs):
-            identifier = _resolve_identifier(request, key)
+            identifier = _resolve_identifier(request, key) if _enabled() else None
             if not identifier:
                 return view_func(request, *args, **kwargs)
 
@@ -41,7 +49,78 @@ def ratelimit(
 
             if current > limit:
                 if block:
-                    return JsonResponse({"detail": "Too many requests"}, status=429)
+                    return too_many_requests()
+                request.limited = True  # type: ignore[attr-defined]
+            return view_func(request, *args, **kwargs)
+
+        return wrapped
+
+    return decorator
+
+
+class InProcRateLimiter:
+    """プロセス内のトークンバケット。ワーカー間では共有されない。"""
+
+    def __init__(self, limit: int, window: float, max_keys: int = _LOCAL_MAX_KEYS) -> None:
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._refill_per_second = limit / window
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        _local_limiters.add(self)
+
+    def check(self, identifier: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            state = self._buckets.pop(identifier, None)
+            if state is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._evict(now)
+                if len(self._buckets) >= self.max_keys:
+                    # 使用中のバケットを捨てるとそのクライアントの残量が満タンに戻るので、
+                    # 送信元を次々に変えれば上限を外せてしまう。入りきらない新しいキーは通さない
+                    return False
+                state = (float(self.limit), now)
+            tokens, last = state
+            tokens = min(float(self.limit), tokens + (now - last) * self._refill_per_second)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            # 末尾に入れ直し、dict の並びを最後に使った順に保つ
+            self._buckets[identifier] = (tokens, now)
+        return allowed
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def _evict(self, now: float) -> None:
+        # window 以上触られていないバケットは満タンに戻っているので状態を持つ必要がない。
+        # 先頭ほど長く使われていないので、まだ使われているものに当たったら止める
+        stale = []
+        for key, (_, last) in self._buckets.items():
+            if now - last < self.window:
+                break
+            stale.append(key)
+        for key in stale:
+            del self._buckets[key]
+
+
+def local_ratelimit(
+    key: str, rate: str, block: bool = False
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """キャッシュを経由しない ratelimit。上限はワーカーごとに適用される。"""
+    limit, window = _parse_rate(rate)
+    limiter = InProcRateLimiter(limit, window)
+
+    def decorator(view_func: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            identifier = _resolve_identifier(request, key) if _enabled() else None
+            if identifier and not limiter.check(identifier):
+                if block:
+                    return too_many_requests()
                 request.limited = True  # type: ignore[attr-defined]
             return view_func(request, *args, **kwargs)
 
@@ -50,6 +129,21 @@ def ratelimit(
     return decorator
 
 
+def too_many_requests() -> JsonResponse:
+    """上限超過時の共通レスポンス。どの上限に掛かっても同じ 429 を返す。"""
+    return JsonResponse({"detail": "Too many requests"}, status=429)
+
+
+def reset_local_ratelimits() -> None:
+    for limiter in list(_local_limiters):
+        limiter.reset()
+
+
+def _enabled() -> bool:
+    # django_ratelimit と同じ設定で、両方の上限をまとめて切れるようにする
+    return getattr(settings, "RATELIMIT_ENABLE", True)
+
+
 def _parse_rate(rate: str) -> tuple[int, int]:
     try:
         count_str, period_str = rate.split("/", 1)
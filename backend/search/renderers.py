@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_FALLBACK_ENCODER = JSONEncoder()
+
+
+def _default(obj: Any) -> Any:
+    # orjson が扱えない型（lazy 文字列や Decimal など）は DRF の encoder に委ねる
+    return _FALLBACK_ENCODER.default(obj)
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):  # type: ignore[override]
+        if data is None:
+            return b""
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
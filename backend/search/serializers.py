@@ -45,6 +45,43 @@ class SearchRequestSerializer(serializers.Serializer):
         return attrs
 
 
+REINDEX_LIMIT_ERROR = "limit must be a non-negative integer"
+
+
+class _IntCoercedField(serializers.IntegerField):
+    """int() と同じ変換をする IntegerField。
+
+    True や 1.5 は 1 として受け付け、"1.0" は不正とする (以前の reindex_view の挙動)。
+    """
+
+    def to_internal_value(self, data):
+        try:
+            return int(data)
+        except (TypeError, ValueError, OverflowError):
+            self.fail("invalid")
+
+
+class ReindexRequestSerializer(serializers.Serializer):
+    source = serializers.ChoiceField(
+        choices=["samples", "arxiv"],
+        default="samples",
+        error_messages={
+            "invalid_choice": "Unknown source",
+            "null": "Unknown source",
+            "blank": "Unknown source",
+        },
+    )
+    limit = _IntCoercedField(
+        min_value=0,
+        required=False,
+        allow_null=True,
+        error_messages={
+            "invalid": REINDEX_LIMIT_ERROR,
+            "min_value": REINDEX_LIMIT_ERROR,
+        },
+    )
+
+
 class SearchHitSerializer(serializers.Serializer):
     file_id = serializers.CharField()
     path = serializers.CharField()
@@ -67,10 +104,25 @@ class SearchResponseSerializer(serializers.Serializer):
 
     @classmethod
     def from_response(cls, response: SearchResponse, **extra_fields) -> dict:
-        # dataclass（slots=True 含む）→ dict（ネストも展開）
-        payload = asdict(response) if is_dataclass(response) else response
-        payload.update({k: v for k, v in extra_fields.items() if v is not None})
+        payload = search_response_payload(response, **extra_fields)
         # data として渡して検証してから返す
         serializer = cls(data=payload)
         serializer.is_valid(raise_exception=True)
         return serializer.data
+
+
+def search_response_payload(response: SearchResponse, **extra_fields) -> dict:
+    """SearchResponse をそのまま JSON にできる dict に変換する (検証はしない)。
+
+    プロバイダが組み立てた dataclass は型が保証されているので、リクエスト毎の
+    ホットパスではシリアライザの再検証を省いてこちらを使う。
+    """
+    # dataclass（slots=True 含む）→ dict（ネストも展開）
+    payload = asdict(response) if is_dataclass(response) else dict(response)
+    # hits と blocks は tuple で保持しているので、JSON 配列として扱いやすい list に揃える
+    payload["hits"] = hits = list(payload["hits"])
+    for hit in hits:
+        if hit.get("blocks") is not None:
+            hit["blocks"] = list(hit["blocks"])
+    payload.update({k: v for k, v in extra_fields.items() if v is not None})
+    return payload
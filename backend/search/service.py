@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
 from typing import Protocol
 
 from .backends import InMemorySearchBackend, OpenSearchBackend, SearchBackendProtocol
@@ -13,7 +14,7 @@ class SearchService:
     def search(self, request: SearchRequest) -> SearchResponse:
         return self.backend.search(request)
 
-    def index_documents(self, documents: list[IndexDocument]) -> None:
+    def index_documents(self, documents: Iterable[IndexDocument]) -> None:
         self.backend.index_documents(documents)
 
     def ensure_index(self) -> None:
@@ -23,6 +24,9 @@ class SearchService:
         self.backend.delete_index()
         self.backend.create_index()
 
+    def rebuild_index(self, documents: Iterable[IndexDocument]) -> None:
+        self.backend.rebuild_index(documents)
+
 
 class SearchServiceFactory(Protocol):
     def __call__(self) -> SearchService: ...
@@ -4,6 +4,7 @@ import html
 import re
 from collections.abc import Iterable, Sequence
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Literal
 
 from .query import (
@@ -60,7 +61,19 @@ class Segment:
 @dataclass(slots=True)
 class SnippetResult:
     snippet: str
-    blocks: list[SnippetBlock]
+    blocks: tuple[SnippetBlock, ...]
+
+
+@lru_cache(maxsize=512)
+def _compile_query_pattern(query: str) -> re.Pattern[str]:
+    # 同じクエリでヒット毎に decode + compile し直さないよう、生のクエリ文字列で引く
+    pattern_text = decode_regex_query(query)
+    try:
+        return re.compile(
+            pattern_text, flags=re.MULTILINE, timeout=REGEX_TIMEOUT_SECONDS  # type: ignore[call-overload]
+        )
+    except TypeError:  # pragma: no cover - Python < 3.11 fallback
+        return re.compile(pattern_text, flags=re.MULTILINE)
 
 
 def find_match(content: str, request: SearchRequest) -> MatchResult | None:
@@ -71,13 +84,7 @@ def find_match(content: str, request: SearchRequest) -> MatchResult | None:
             return None
         end = start + len(needle)
     else:
-        pattern_text = decode_regex_query(request.query)
-        try:
-            pattern = re.compile(
-                pattern_text, flags=re.MULTILINE, timeout=REGEX_TIMEOUT_SECONDS  # type: ignore[call-overload]
-            )
-        except TypeError:  # pragma: no cover - Python < 3.11 fallback
-            pattern = re.compile(pattern_text, flags=re.MULTILINE)
+        pattern = _compile_query_pattern(request.query)
         match = pattern.search(content)
         if not match:
             return None
@@ -160,13 +167,7 @@ def _compute_highlight_spans(
             spans.append((idx, idx + len(needle)))
             start = idx + len(needle)
         return spans
-    pattern_text = decode_regex_query(query)
-    try:
-        pattern = re.compile(
-            pattern_text, flags=re.MULTILINE, timeout=REGEX_TIMEOUT_SECONDS  # type: ignore[call-overload]
-        )
-    except TypeError:  # pragma: no cover - Python < 3.11 fallback
-        pattern = re.compile(pattern_text, flags=re.MULTILINE)
+    pattern = _compile_query_pattern(query)
     spans = []
     for match in pattern.finditer(snippet_text):
         start, end = match.span()
@@ -181,7 +182,7 @@ def _build_blocks(
     snippet_end: int,
     segments: Sequence[Segment],
     highlight_spans: Sequence[tuple[int, int]],
-) -> list[SnippetBlock]:
+) -> tuple[SnippetBlock, ...]:
     blocks: list[SnippetBlock] = []
     for segment in segments:
         if segment.end <= snippet_start or segment.start >= snippet_end:
@@ -216,7 +217,7 @@ def _build_blocks(
                     marked=bool(spans),
                 )
             )
-    return blocks
+    return tuple(blocks)
 
 
 def _relative_spans(
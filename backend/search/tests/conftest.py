@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+import pytest
+from django.core.cache import caches
+
+from search.providers import get_provider_name
+from search.ratelimit import reset_local_ratelimits
+from search.views import SEARCH_CACHE_ALIAS
+
+
+@pytest.fixture(autouse=True)
+def _reset_process_caches() -> Iterator[None]:
+    # プロセス単位のキャッシュが monkeypatch した環境変数を覆い隠さないようにする
+    get_provider_name.cache_clear()
+    caches[SEARCH_CACHE_ALIAS].clear()
+    reset_local_ratelimits()
+    yield
+    get_provider_name.cache_clear()
+    caches[SEARCH_CACHE_ALIAS].clear()
+    reset_local_ratelimits()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass
 from typing import Any, Callable
 
@@ -87,8 +88,9 @@ def backend_case(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch
     payloads: list[dict[str, Any]] = []
 
     def fake_post(
-        url: str, payload: dict[str, Any], *, timeout: float = zoekt.DEFAULT_TIMEOUT
+        url: str, body: bytes, *, timeout: float = zoekt.DEFAULT_TIMEOUT
     ) -> dict[str, Any]:
+        payload = json.loads(body)
         payloads.append(payload)
         pattern = str(payload.get("query", {}).get("pattern", ""))
         if pattern == "\\alpha":
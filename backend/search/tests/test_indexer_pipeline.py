@@ -22,8 +22,8 @@ def test_commands_are_searchable(tmp_path: Path) -> None:
     records = collect_records(tmp_path)
     assert len(records) == 1
     record = records[0]
-    assert "\\triple" in record.commands
-    assert "\\iiint" in record.commands
+    assert "triple" in record.commands
+    assert "iiint" in record.commands
 
     from search.types import IndexDocument
 
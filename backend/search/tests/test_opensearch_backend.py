@@ -11,7 +11,7 @@ from search.backends import (
     get_index_definition,
 )
 from search.query import decode_literal_query, parse_payload
-from search.types import SearchRequest
+from search.types import IndexDocument, SearchRequest
 
 
 class FakeIndices:
@@ -180,3 +180,138 @@ def test_opensearch_backend_limits_hits_to_request_size() -> None:
 
     assert len(response.hits) == request.size
     assert client.last_size == request.size
+
+
+def test_index_documents_streams_actions_in_bounded_chunks(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    captured: dict = {}
+
+    def fake_bulk(client, actions, **kwargs):  # type: ignore[no-untyped-def]
+        captured["is_list"] = isinstance(actions, list)
+        captured["ids"] = [action["_id"] for action in actions]
+        captured["kwargs"] = kwargs
+
+    monkeypatch.setattr("search.backends.helpers.bulk", fake_bulk)
+    backend = OpenSearchBackend(client=FakeClient(indices=FakeIndices()), index_name="idx")
+
+    documents = (
+        IndexDocument(
+            file_id=f"doc-{index}",
+            path=f"doc-{index}.tex",
+            url="",
+            year=None,
+            source="samples",
+            content="x",
+            commands=[],
+            line_offsets=[1],
+        )
+        for index in range(3)
+    )
+    backend.index_documents(documents)
+
+    assert captured["is_list"] is False
+    assert captured["ids"] == ["doc-0", "doc-1", "doc-2"]
+    assert captured["kwargs"] == {"chunk_size": 500, "max_chunk_bytes": 10 * 1024 * 1024}
+
+
+class RecordingIndices:
+    def __init__(self, existing: dict[str, list[str]]) -> None:
+        # エイリアス名 (または実体名) → 裏にある実体インデックス
+        self.existing = existing
+        self.calls: list[tuple] = []
+
+    def exists(self, index: str) -> bool:
+        return index in self.existing
+
+    def get(self, index: str) -> dict[str, dict]:
+        return {name: {} for name in self.existing[index]}
+
+    def create(self, index: str, body: dict) -> None:
+        self.calls.append(("create", index))
+
+    def delete(self, index: str) -> None:
+        self.calls.append(("delete", index))
+
+    def update_aliases(self, body: dict) -> None:
+        self.calls.append(("update_aliases", body["actions"]))
+
+
+def _documents(count: int):  # type: ignore[no-untyped-def]
+    return (
+        IndexDocument(
+            file_id=f"doc-{index}",
+            path=f"doc-{index}.tex",
+            url="",
+            year=None,
+            source="samples",
+            content="x",
+            commands=[],
+            line_offsets=[1],
+        )
+        for index in range(count)
+    )
+
+
+def test_rebuild_index_swaps_alias_after_bulk(monkeypatch: pytest.MonkeyPatch) -> None:
+    indexed: list[tuple[str, str]] = []
+
+    def fake_bulk(client, actions, **kwargs):  # type: ignore[no-untyped-def]
+        indexed.extend((action["_index"], action["_id"]) for action in actions)
+
+    monkeypatch.setattr("search.backends.helpers.bulk", fake_bulk)
+    monkeypatch.setattr("search.backends.time.time_ns", lambda: 42)
+    indices = RecordingIndices({"tex": ["tex-1"]})
+    backend = OpenSearchBackend(client=FakeClient(indices=indices), index_name="tex")
+
+    backend.rebuild_index(_documents(2))
+
+    assert indexed == [("tex-42", "doc-0"), ("tex-42", "doc-1")]
+    assert indices.calls == [
+        ("create", "tex-42"),
+        (
+            "update_aliases",
+            [
+                {"remove": {"index": "tex-1", "alias": "tex"}},
+                {"add": {"index": "tex-42", "alias": "tex"}},
+            ],
+        ),
+        ("delete", "tex-1"),
+    ]
+
+
+def test_rebuild_index_replaces_legacy_concrete_index(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("search.backends.helpers.bulk", lambda client, actions, **kwargs: list(actions))
+    monkeypatch.setattr("search.backends.time.time_ns", lambda: 42)
+    indices = RecordingIndices({"tex": ["tex"]})
+    backend = OpenSearchBackend(client=FakeClient(indices=indices), index_name="tex")
+
+    backend.rebuild_index(_documents(1))
+
+    assert indices.calls[1:] == [
+        (
+            "update_aliases",
+            [
+                {"remove_index": {"index": "tex"}},
+                {"add": {"index": "tex-42", "alias": "tex"}},
+            ],
+        ),
+    ]
+
+
+def test_rebuild_index_keeps_current_index_when_documents_fail(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def failing_documents():  # type: ignore[no-untyped-def]
+        yield from _documents(1)
+        raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+
+    monkeypatch.setattr("search.backends.helpers.bulk", lambda client, actions, **kwargs: list(actions))
+    monkeypatch.setattr("search.backends.time.time_ns", lambda: 42)
+    indices = RecordingIndices({"tex": ["tex-1"]})
+    backend = OpenSearchBackend(client=FakeClient(indices=indices), index_name="tex")
+
+    with pytest.raises(UnicodeDecodeError):
+        backend.rebuild_index(failing_documents())
+
+    assert indices.calls == [("create", "tex-42"), ("delete", "tex-42")]
@@ -30,3 +30,14 @@ def test_get_provider_raises_for_unknown_name(monkeypatch: pytest.MonkeyPatch) -
     monkeypatch.delenv("SEARCH_PROVIDER", raising=False)
     with pytest.raises(ValueError):
         get_provider("unknown")
+
+
+def test_get_provider_name_is_cached_per_process(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SEARCH_PROVIDER", "zoekt")
+    assert get_provider_name() == "zoekt"
+
+    monkeypatch.setenv("SEARCH_PROVIDER", "opensearch")
+    assert get_provider_name() == "zoekt"
+
+    get_provider_name.cache_clear()
+    assert get_provider_name() == "opensearch"
@@ -11,7 +11,7 @@ from django.http import JsonResponse
 from django.test import Client, override_settings
 from django.urls import path
 
-from search.ratelimit import ratelimit
+from search.ratelimit import InProcRateLimiter, local_ratelimit, ratelimit
 
 
 _module_counter = itertools.count()
@@ -168,3 +168,96 @@ def test_ratelimit_header_key_skips_when_header_missing() -> None:
 def test_ratelimit_invalid_rate_raises_value_error() -> None:
     with pytest.raises(ValueError):
         ratelimit(key="ip", rate="oops")
+
+
+def test_local_ratelimit_blocks_without_touching_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = Client()
+
+    def fail(*args: Any, **kwargs: Any) -> None:
+        raise AssertionError("cache should not be used")
+
+    monkeypatch.setattr(cache, "add", fail)
+    monkeypatch.setattr(cache, "incr", fail)
+
+    @local_ratelimit(key="ip", rate="1/m", block=True)
+    def limited_view(request):  # type: ignore[no-untyped-def]
+        return JsonResponse({"status": "ok"})
+
+    module_name = _register_view(limited_view)
+
+    try:
+        with override_settings(ROOT_URLCONF=module_name):
+            first = client.get("/limited/", REMOTE_ADDR="10.0.0.5")
+            assert first.status_code == 200
+
+            second = client.get("/limited/", REMOTE_ADDR="10.0.0.5")
+            assert second.status_code == 429
+            assert second.json() == {"detail": "Too many requests"}
+
+            other = client.get("/limited/", REMOTE_ADDR="10.0.0.6")
+            assert other.status_code == 200
+    finally:
+        sys.modules.pop(module_name, None)
+
+
+def test_inproc_ratelimiter_refills_and_evicts_stale_keys(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = [100.0]
+    monkeypatch.setattr("search.ratelimit.time.monotonic", lambda: now[0])
+    limiter = InProcRateLimiter(limit=2, window=60.0, max_keys=2)
+
+    assert limiter.check("a")
+    assert limiter.check("a")
+    assert not limiter.check("a")
+
+    now[0] += 30.0
+    assert limiter.check("a")
+    assert not limiter.check("a")
+
+    limiter.check("b")
+    now[0] += 60.0
+    limiter.check("c")
+    assert set(limiter._buckets) == {"c"}
+
+
+def test_inproc_ratelimiter_fails_closed_instead_of_evicting_live_buckets(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = [100.0]
+    monkeypatch.setattr("search.ratelimit.time.monotonic", lambda: now[0])
+    limiter = InProcRateLimiter(limit=1, window=60.0, max_keys=2)
+
+    assert limiter.check("a")
+    now[0] += 10.0
+    assert limiter.check("b")
+    now[0] += 10.0
+    # a を使い直すと、最後に使った順では b のほうが古くなる
+    assert not limiter.check("a")
+
+    # 満杯で捨てられるバケットが無いので、新しい送信元は通さず、a の残量も戻さない
+    assert not limiter.check("c")
+    assert not limiter.check("a")
+    assert set(limiter._buckets) == {"a", "b"}
+
+    now[0] += 55.0
+    # b は 60 秒触られていないので捨てられ、c が入る。a はまだ残る
+    assert limiter.check("c")
+    assert set(limiter._buckets) == {"a", "c"}
+
+
+def test_local_ratelimit_honours_ratelimit_enable() -> None:
+    client = Client()
+
+    @local_ratelimit(key="ip", rate="1/m", block=True)
+    def limited_view(request):  # type: ignore[no-untyped-def]
+        return JsonResponse({"status": "ok"})
+
+    module_name = _register_view(limited_view)
+
+    try:
+        with override_settings(ROOT_URLCONF=module_name, RATELIMIT_ENABLE=False):
+            for _ in range(3):
+                assert client.get("/limited/", REMOTE_ADDR="10.0.0.7").status_code == 200
+    finally:
+        sys.modules.pop(module_name, None)
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import json
+from decimal import Decimal
+
+from rest_framework.exceptions import ErrorDetail
+
+from search.renderers import ORJSONRenderer
+
+
+def test_orjson_renderer_encodes_nested_payload() -> None:
+    payload = {
+        "hits": [{"path": "a.tex", "snippet": "<mark>\\alpha</mark>", "line": 3}],
+        "total": 1,
+        "errors": {"page": [ErrorDetail("A valid integer is required.", code="invalid")]},
+    }
+
+    rendered = ORJSONRenderer().render(payload)
+
+    assert isinstance(rendered, bytes)
+    assert json.loads(rendered) == {
+        "hits": [{"path": "a.tex", "snippet": "<mark>\\alpha</mark>", "line": 3}],
+        "total": 1,
+        "errors": {"page": ["A valid integer is required."]},
+    }
+
+
+def test_orjson_renderer_falls_back_for_unsupported_types() -> None:
+    rendered = ORJSONRenderer().render({"score": Decimal("1.5"), 1: "x"})
+
+    assert json.loads(rendered) == {"score": 1.5, "1": "x"}
+
+
+def test_orjson_renderer_returns_empty_body_for_none() -> None:
+    assert ORJSONRenderer().render(None) == b""
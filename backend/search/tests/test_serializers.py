@@ -8,8 +8,9 @@ from search.serializers import (
     SearchRequestSerializer,
     SearchResponseSerializer,
     SnippetBlockSerializer,
+    search_response_payload,
 )
-from search.types import SearchHit, SearchResponse, TextSnippetBlock
+from search.types import MathSnippetBlock, SearchHit, SearchResponse, TextSnippetBlock
 
 
 def test_search_response_serializer_roundtrip():
@@ -37,6 +38,71 @@ def test_search_response_serializer_roundtrip():
     assert payload["took_end_to_end_ms"] == 7
 
 
+def test_search_response_serializer_accepts_tuple_blocks() -> None:
+    response = SearchResponse(
+        hits=[
+            SearchHit(
+                file_id="1",
+                path="file.tex",
+                line=2,
+                blocks=(
+                    TextSnippetBlock(html="before"),
+                    MathSnippetBlock(tex="\\alpha", display=True, marked=True),
+                ),
+            )
+        ],
+        total=1,
+        took_provider_ms=1,
+        page=1,
+        size=20,
+    )
+
+    payload = SearchResponseSerializer.from_response(response, took_end_to_end_ms=2)
+
+    blocks = payload["hits"][0]["blocks"]
+    assert [block["kind"] for block in blocks] == ["text", "math"]
+    assert blocks[1]["tex"] == "\\alpha"
+    assert blocks[1]["marked"] is True
+
+
+def test_search_response_payload_matches_validated_output() -> None:
+    response = SearchResponse(
+        hits=(
+            SearchHit(
+                file_id="1",
+                path="file.tex",
+                line=4,
+                snippet="<mark>x</mark>",
+                url="http://example.com",
+                blocks=(
+                    TextSnippetBlock(html="<mark>x</mark>"),
+                    MathSnippetBlock(tex="x^2", display=False, marked=False),
+                ),
+            ),
+        ),
+        total=1,
+        took_provider_ms=3,
+        page=1,
+        size=20,
+        next_cursor="20",
+    )
+
+    fast = search_response_payload(response, took_end_to_end_ms=9)
+    validated = SearchResponseSerializer.from_response(response, took_end_to_end_ms=9)
+
+    assert fast == validated
+    assert isinstance(fast["hits"], list)
+
+
+def test_search_response_is_hashable() -> None:
+    hit = SearchHit(file_id="1", path="file.tex", line=1, blocks=(TextSnippetBlock(html="x"),))
+    response = SearchResponse(hits=(hit,), total=1, took_provider_ms=1, page=1, size=20)
+
+    assert hash(response) == hash(
+        SearchResponse(hits=(hit,), total=1, took_provider_ms=1, page=1, size=20)
+    )
+
+
 def test_snippet_block_serializer_requires_math_tex() -> None:
     serializer = SnippetBlockSerializer(data={"kind": "math", "html": "<p>ignored</p>"})
 
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from search.query import parse_payload
-from search.snippets import build_snippet, find_match
+from search.snippets import _compile_query_pattern, build_snippet, find_match
 from search.types import MathSnippetBlock, TextSnippetBlock
 
 
@@ -52,3 +52,20 @@ def test_build_snippet_math_blocks_highlight_inside_math():
     math_block = math_blocks[0]
     assert math_block.marked is True
     assert "\\class{mjx-hl}{\\sum" in math_block.tex
+
+
+def test_regex_pattern_is_compiled_once_per_query():
+    _compile_query_pattern.cache_clear()
+    request = parse_payload({"q": r"\\\\frac\\w*", "mode": "regex"})
+    documents = ["\\frac{a}{b}", "x\n\\fraction", "\\frac12"]
+
+    for content in documents:
+        match = find_match(content, request)
+        assert match is not None
+        build_snippet(
+            content, match, context_lines=1, mode=request.mode, query=request.query
+        )
+
+    info = _compile_query_pattern.cache_info()
+    assert info.misses == 1
+    assert info.hits == 2 * len(documents) - 1
@@ -11,7 +11,7 @@ from rest_framework.test import APIClient
 from structlog.testing import capture_logs
 
 from search import views
-from search.types import SearchRequest, SearchResponse
+from search.types import SearchHit, SearchRequest, SearchResponse
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "texgrep.settings")
 django.setup()
@@ -23,14 +23,15 @@ def api_client() -> APIClient:
 
 
 def _install_perf_counter(monkeypatch: pytest.MonkeyPatch, values: list[float]) -> None:
-    state = {"values": list(values)}
+    ns_values = [round(value * 1_000_000_000) for value in values]
+    state = {"values": list(ns_values)}
 
-    def _perf_counter() -> float:
+    def _perf_counter_ns() -> int:
         if state["values"]:
             return state["values"].pop(0)
-        return values[-1]
+        return ns_values[-1]
 
-    monkeypatch.setattr(views.time, "perf_counter", _perf_counter)
+    monkeypatch.setattr(views.time, "perf_counter_ns", _perf_counter_ns)
 
 
 def _install_provider(
@@ -42,6 +43,20 @@ def _install_provider(
     monkeypatch.setattr(views, "get_provider_name", lambda: provider_name)
 
 
+def test_health_returns_static_json(api_client: APIClient) -> None:
+    response = api_client.get("/api/health")
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/json"
+    assert response.json() == {"status": "ok"}
+
+
+def test_health_rejects_non_get(api_client: APIClient) -> None:
+    response = api_client.post("/api/health")
+
+    assert response.status_code == 405
+
+
 def test_literal_search_records_end_to_end_duration(
     api_client: APIClient, monkeypatch: pytest.MonkeyPatch
 ) -> None:
@@ -205,6 +220,107 @@ def test_internal_error_returns_structured_payload(
     assert any(entry["event"] == "search.internal_error" for entry in logs)
 
 
+def test_daily_limit_returns_same_429_as_minute_limit(
+    api_client: APIClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(
+        "django_ratelimit.decorators.is_ratelimited", lambda **_kwargs: True
+    )
+    _install_provider(monkeypatch, lambda request: pytest.fail("provider must not run"))
+
+    response = api_client.post("/api/search", {"q": "foo", "mode": "literal"}, format="json")
+
+    assert response.status_code == 429
+    assert response.json() == {"detail": "Too many requests"}
+
+
+def test_repeated_search_is_served_from_cache(
+    api_client: APIClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: list[SearchRequest] = []
+
+    def fake_provider(request: SearchRequest) -> SearchResponse:
+        calls.append(request)
+        return SearchResponse(
+            hits=[], total=3, took_provider_ms=4, page=request.page, size=request.size
+        )
+
+    _install_provider(monkeypatch, fake_provider, provider_name="opensearch")
+
+    with capture_logs() as logs:
+        first = api_client.post(
+            "/api/search", {"q": "foo", "mode": "literal"}, format="json"
+        )
+        second = api_client.post(
+            "/api/search", {"q": "foo", "mode": "literal"}, format="json"
+        )
+        other = api_client.post(
+            "/api/search", {"q": "foo", "mode": "literal", "page": 2}, format="json"
+        )
+
+    assert first.status_code == second.status_code == other.status_code == 200
+    assert len(calls) == 2
+    assert second.json()["total"] == 3
+    assert second.json()["took_provider_ms"] == 4
+    cached_flags = [entry["cached"] for entry in logs if entry["event"] == "search.success"]
+    assert cached_flags == [False, True, False]
+
+
+def test_large_hit_page_is_a_single_json_body(
+    api_client: APIClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def fake_provider(request: SearchRequest) -> SearchResponse:
+        hits = [
+            SearchHit(file_id=f"f{i}", path=f"docs/{i}.tex", line=i + 1, snippet="x")
+            for i in range(request.size)
+        ]
+        return SearchResponse(
+            hits=hits, total=120, took_provider_ms=3, page=request.page, size=request.size
+        )
+
+    _install_provider(monkeypatch, fake_provider, provider_name="opensearch")
+
+    large = api_client.post(
+        "/api/search", {"q": "foo", "mode": "literal", "size": 50}, format="json"
+    )
+
+    # ASGI では同期イテレータのストリーミングは結局全件をメモリに載せるので、1 回でエンコードして返す
+    assert large.status_code == 200
+    assert not large.streaming
+    assert large["Content-Type"] == "application/json"
+    assert large["Content-Length"] == str(len(large.content))
+    data = large.json()
+    assert len(data["hits"]) == 50
+    assert data["hits"][49]["path"] == "docs/49.tex"
+    assert data["total"] == 120
+    assert "took_end_to_end_ms" in data
+
+
+def test_bypass_cache_header_forces_provider_call(
+    api_client: APIClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: list[SearchRequest] = []
+
+    def fake_provider(request: SearchRequest) -> SearchResponse:
+        calls.append(request)
+        return SearchResponse(
+            hits=[], total=0, took_provider_ms=1, page=request.page, size=request.size
+        )
+
+    _install_provider(monkeypatch, fake_provider, provider_name="opensearch")
+
+    for _ in range(2):
+        response = api_client.post(
+            "/api/search",
+            {"q": "foo", "mode": "literal"},
+            format="json",
+            HTTP_X_BYPASS_CACHE="1",
+        )
+        assert response.status_code == 200
+
+    assert len(calls) == 2
+
+
 def test_reindex_limit_must_be_numeric(
     api_client: APIClient, monkeypatch: pytest.MonkeyPatch
 ) -> None:
@@ -241,3 +357,90 @@ def test_reindex_limit_must_not_be_negative(
 
     assert response.status_code == 400
     assert response.json()["detail"] == "limit must be a non-negative integer"
+
+
+def test_reindex_rejects_unknown_source(
+    api_client: APIClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    class _ShouldNotRun:
+        def delay(self, **kwargs: Any) -> None:  # pragma: no cover
+            raise AssertionError("reindex_task.delay should not be called")
+
+    monkeypatch.setattr(views, "reindex_task", _ShouldNotRun())
+
+    response = api_client.post(
+        "/api/reindex", {"source": "nowhere"}, format="json"
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown source"
+
+
+def test_reindex_queues_task_with_coerced_limit(
+    api_client: APIClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    captured: dict[str, Any] = {}
+
+    class _Task:
+        id = "task-1"
+
+    class _Recorder:
+        def delay(self, **kwargs: Any) -> _Task:
+            captured.update(kwargs)
+            return _Task()
+
+    monkeypatch.setattr(views, "reindex_task", _Recorder())
+
+    response = api_client.post("/api/reindex", {"limit": "5"}, format="json")
+
+    assert response.status_code == 202
+    assert response.json() == {"task_id": "task-1", "status": "queued"}
+    assert captured == {"source": "samples", "limit": 5}
+
+
+@pytest.mark.parametrize(
+    ("limit", "expected"),
+    [(True, 1), (1.5, 1), (" 7 ", 7), (None, None)],
+)
+def test_reindex_limit_is_coerced_like_int(
+    api_client: APIClient, monkeypatch: pytest.MonkeyPatch, limit: Any, expected: int | None
+) -> None:
+    captured: dict[str, Any] = {}
+
+    class _Task:
+        id = "task-1"
+
+    class _Recorder:
+        def delay(self, **kwargs: Any) -> _Task:
+            captured.update(kwargs)
+            return _Task()
+
+    monkeypatch.setattr(views, "reindex_task", _Recorder())
+
+    response = api_client.post("/api/reindex", {"limit": limit}, format="json")
+
+    assert response.status_code == 202
+    assert captured == {"source": "samples", "limit": expected}
+
+
+@pytest.mark.parametrize(
+    ("payload", "detail"),
+    [
+        ({"limit": "1.0"}, "limit must be a non-negative integer"),
+        ({"limit": [1]}, "limit must be a non-negative integer"),
+        ({"source": ""}, "Unknown source"),
+    ],
+)
+def test_reindex_rejects_inputs_int_rejects(
+    api_client: APIClient, monkeypatch: pytest.MonkeyPatch, payload: dict[str, Any], detail: str
+) -> None:
+    class _ShouldNotRun:
+        def delay(self, **kwargs: Any) -> None:  # pragma: no cover
+            raise AssertionError("reindex_task.delay should not be called")
+
+    monkeypatch.setattr(views, "reindex_task", _ShouldNotRun())
+
+    response = api_client.post("/api/reindex", payload, format="json")
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 from typing import TypedDict
 
 import pytest
@@ -35,10 +36,10 @@ def test_zoekt_provider_returns_snippet_blocks(monkeypatch: pytest.MonkeyPatch)
     post_call: dict = {}
 
     def fake_post(
-        url: str, payload: dict, *, timeout: float = zoekt.DEFAULT_TIMEOUT
+        url: str, body: bytes, *, timeout: float = zoekt.DEFAULT_TIMEOUT
     ) -> dict:
         post_call["url"] = url
-        post_call["payload"] = payload
+        post_call["payload"] = json.loads(body)
         return zoekt_response
 
     monkeypatch.setenv("ZOEKT_URL", "http://zoekt.test:6070/")
@@ -99,9 +100,9 @@ def test_zoekt_provider_falls_back_when_stats_missing(
     get_calls: list[dict] = []
 
     def fake_post(
-        url: str, payload: dict, *, timeout: float = zoekt.DEFAULT_TIMEOUT
+        url: str, body: bytes, *, timeout: float = zoekt.DEFAULT_TIMEOUT
     ) -> dict:
-        post_calls.append({"url": url, "payload": payload})
+        post_calls.append({"url": url, "payload": json.loads(body)})
         return zoekt_response
 
     def fake_get(
@@ -180,7 +181,7 @@ def test_zoekt_provider_limits_hits_to_request_size(
     }
 
     def fake_post(
-        url: str, payload: dict, *, timeout: float = zoekt.DEFAULT_TIMEOUT
+        url: str, body: bytes, *, timeout: float = zoekt.DEFAULT_TIMEOUT
     ) -> dict:
         return zoekt_response
 
@@ -232,7 +233,7 @@ def test_zoekt_provider_uses_fallback_snippet_when_line_matches_empty(
     fake_time = FakeTime()
 
     def fake_post(
-        url: str, payload: dict, *, timeout: float = zoekt.DEFAULT_TIMEOUT
+        url: str, body: bytes, *, timeout: float = zoekt.DEFAULT_TIMEOUT
     ) -> dict:
         assert url.endswith("/api/search")
         return zoekt_response
@@ -249,3 +250,31 @@ def test_zoekt_provider_uses_fallback_snippet_when_line_matches_empty(
     assert response.hits
     hit = response.hits[0]
     assert hit.snippet is not None and "needle" in hit.snippet
+
+
+def test_zoekt_request_body_is_encoded_once_per_query(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    bodies: list[bytes] = []
+
+    def fake_post(
+        url: str, body: bytes, *, timeout: float = zoekt.DEFAULT_TIMEOUT
+    ) -> dict:
+        bodies.append(body)
+        return {"FileMatches": [], "Stats": {"Duration": 0.001, "MatchCount": 0}}
+
+    monkeypatch.setenv("ZOEKT_URL", "http://zoekt.test:6070")
+    monkeypatch.setattr(zoekt, "_http_post", fake_post)
+    zoekt._encode_query_payload.cache_clear()
+
+    request = SearchRequest(query="needle", mode="literal", filters={}, page=1, size=5)
+    zoekt.search(request)
+    zoekt.search(request)
+
+    assert bodies[0] is bodies[1]
+    assert json.loads(bodies[0]) == {
+        "query": {"type": "substring", "pattern": "needle", "caseSensitive": True},
+        "num": 5,
+        "offset": 0,
+    }
+    assert zoekt._encode_query_payload.cache_info().hits == 1
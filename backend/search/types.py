@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
+from collections.abc import Iterable, Sequence
 from dataclasses import dataclass
 from typing import Literal
 
@@ -8,13 +8,13 @@ SnippetTextKind = Literal["text"]
 SnippetMathKind = Literal["math"]
 
 
-@dataclass(slots=True)
+@dataclass(slots=True, frozen=True)
 class TextSnippetBlock:
     kind: SnippetTextKind = "text"
     html: str = ""
 
 
-@dataclass(slots=True)
+@dataclass(slots=True, frozen=True)
 class MathSnippetBlock:
     kind: SnippetMathKind = "math"
     tex: str = ""
@@ -37,19 +37,19 @@ class SearchRequest:
     cursor: str | None = None
 
 
-@dataclass(slots=True)
+@dataclass(slots=True, frozen=True)
 class SearchHit:
     file_id: str
     path: str
     line: int
     url: str = ""
     snippet: str | None = None
-    blocks: list[SnippetBlock] | None = None
+    blocks: tuple[SnippetBlock, ...] | None = None
 
 
-@dataclass(slots=True)
+@dataclass(slots=True, frozen=True)
 class SearchResponse:
-    hits: list[SearchHit]
+    hits: tuple[SearchHit, ...]
     total: int
     took_provider_ms: int
     page: int
@@ -66,4 +66,4 @@ class IndexDocument:
     source: str | None
     content: str
     commands: Iterable[str] | None = None
-    line_offsets: list[int] | None = None
+    line_offsets: Sequence[int] | None = None
@@ -1,41 +1,63 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
 import time
-import uuid
 
 import structlog
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
 from django_ratelimit.decorators import ratelimit
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
 from .providers import get_provider, get_provider_name
-from .serializers import SearchRequestSerializer, SearchResponseSerializer
+from .ratelimit import local_ratelimit, too_many_requests
+from .serializers import (
+    ReindexRequestSerializer,
+    SearchRequestSerializer,
+    search_response_payload,
+)
 from .tasks import reindex_task
+from .types import SearchRequest
 
 logger = structlog.get_logger(__name__)
 
 INVALID_REQUEST_CODE = "invalid_request"
 INTERNAL_ERROR_CODE = "internal_error"
 
+SEARCH_CACHE_ALIAS = "search"
+BYPASS_CACHE_HEADER = "X-Bypass-Cache"
 
-@api_view(["GET"])
+_HEALTH_BODY = b'{"status":"ok"}'
+
+
+# ロードバランサから高頻度で叩かれるので DRF を通さず、固定のバイト列を返す
+@require_GET
 def health_view(request):  # type: ignore[override]
-    return Response({"status": "ok"})
+    return HttpResponse(_HEALTH_BODY, content_type="application/json")
 
 
+# 分単位の上限はワーカー内のトークンバケットで判定する。日次の上限は django_ratelimit だが、
+# default キャッシュも LocMemCache なのでこちらもワーカー単位で数えている。
+# django_ratelimit は block=True だと 403 になるため、自前で判定して同じ 429 を返す
 @api_view(["POST"])
-@ratelimit(key="ip", rate="60/m", block=True)
-@ratelimit(key="ip", rate="1000/d", block=True)
+@local_ratelimit(key="ip", rate="60/m", block=True)
+@ratelimit(key="ip", rate="1000/d", block=False)
 def search_view(request):  # type: ignore[override]
-    start_time = time.perf_counter()
-    request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
+    if getattr(request, "limited", False):
+        return too_many_requests()
+    start_ns = time.perf_counter_ns()
+    request_id = request.headers.get("X-Request-ID") or os.urandom(16).hex()
     provider_name = get_provider_name()
     mode = request.data.get("mode") or "literal"
 
     serializer = SearchRequestSerializer(data=request.data)
     if not serializer.is_valid():
-        took_ms = int((time.perf_counter() - start_time) * 1000)
+        took_ms = _elapsed_ms(start_ns)
         logger.bind(
             request_id=request_id,
             provider=provider_name,
@@ -60,7 +82,7 @@ def search_view(request):  # type: ignore[override]
     log = logger.bind(request_id=request_id, provider=provider_name, mode=mode)
 
     if search_request.mode == "regex" and provider_name != "zoekt":
-        took_ms = int((time.perf_counter() - start_time) * 1000)
+        took_ms = _elapsed_ms(start_ns)
         log.info(
             "search.invalid_request",
             took_ms=took_ms,
@@ -75,11 +97,27 @@ def search_view(request):  # type: ignore[override]
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    result_cache = caches[SEARCH_CACHE_ALIAS]
+    use_cache = BYPASS_CACHE_HEADER not in request.headers
+    cache_key = _result_cache_key(provider_name, search_request)
+    cached = result_cache.get(cache_key) if use_cache else None
+    if cached is not None:
+        took_end_to_end_ms = _elapsed_ms(start_ns)
+        log.info(
+            "search.success",
+            took_ms=took_end_to_end_ms,
+            status_code=status.HTTP_200_OK,
+            hits=len(cached["hits"]),
+            total=cached["total"],
+            cached=True,
+        )
+        return Response({**cached, "took_end_to_end_ms": took_end_to_end_ms})
+
     provider = get_provider(provider_name)
     try:
         response = provider(search_request)
     except Exception:
-        took_ms = int((time.perf_counter() - start_time) * 1000)
+        took_ms = _elapsed_ms(start_ns)
         log.error(
             "search.internal_error",
             took_ms=took_ms,
@@ -94,45 +132,54 @@ def search_view(request):  # type: ignore[override]
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
 
-    took_end_to_end_ms = int((time.perf_counter() - start_time) * 1000)
-    payload = SearchResponseSerializer.from_response(
+    took_end_to_end_ms = _elapsed_ms(start_ns)
+    payload = search_response_payload(
         response,
         took_end_to_end_ms=took_end_to_end_ms,
     )
+    if use_cache:
+        result_cache.set(cache_key, payload)
     log.info(
         "search.success",
         took_ms=took_end_to_end_ms,
         status_code=status.HTTP_200_OK,
         hits=len(response.hits),
         total=response.total,
+        cached=False,
     )
     return Response(payload)
 
 
 @api_view(["POST"])
 def reindex_view(request):  # type: ignore[override]
-    source = request.data.get("source", "samples")
-    if source not in {"samples", "arxiv"}:
-        return Response(
-            {"detail": "Unknown source"}, status=status.HTTP_400_BAD_REQUEST
-        )
-    limit_value = request.data.get("limit")
-    if limit_value is not None:
-        try:
-            limit = int(limit_value)
-        except (TypeError, ValueError):
-            return Response(
-                {"detail": "limit must be a non-negative integer"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        if limit < 0:
-            return Response(
-                {"detail": "limit must be a non-negative integer"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-    else:
-        limit = None
+    serializer = ReindexRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        detail = next(iter(serializer.errors.values()))[0]
+        return Response({"detail": detail}, status=status.HTTP_400_BAD_REQUEST)
+    source = serializer.validated_data["source"]
+    limit = serializer.validated_data.get("limit")
     task = reindex_task.delay(source=source, limit=limit)
     return Response(
         {"task_id": task.id, "status": "queued"}, status=status.HTTP_202_ACCEPTED
     )
+
+
+def _elapsed_ms(start_ns: int) -> int:
+    return (time.perf_counter_ns() - start_ns) // 1_000_000
+
+
+def _result_cache_key(provider_name: str, search_request: SearchRequest) -> str:
+    raw = json.dumps(
+        [
+            provider_name,
+            search_request.mode,
+            search_request.query,
+            search_request.filters,
+            search_request.page,
+            search_request.size,
+            search_request.cursor,
+        ],
+        sort_keys=True,
+    )
+    digest = hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+    return f"search:{digest}"
@@ -15,12 +15,11 @@ SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", "changeme")
 DEBUG = os.environ.get("DJANGO_DEBUG", "0") == "1"
 ALLOWED_HOSTS = os.environ.get("DJANGO_ALLOWED_HOSTS", "*").split(",")
 
+# API 専用なので admin / sessions / messages は載せない。
+# auth と contenttypes は DRF の AnonymousUser が参照するため残す。
 INSTALLED_APPS = [
-    "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
-    "django.contrib.sessions",
-    "django.contrib.messages",
     "django.contrib.staticfiles",
     "corsheaders",
     "rest_framework",
@@ -28,15 +27,11 @@ INSTALLED_APPS = [
     "search",
 ]
 
+# セッション・認証・CSRF を使う画面は無いので、リクエスト毎の処理を最小限にする
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
-    "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
 ROOT_URLCONF = "texgrep.urls"
@@ -50,8 +45,6 @@ TEMPLATES = [
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
-                "django.contrib.auth.context_processors.auth",
-                "django.contrib.messages.context_processors.messages",
             ]
         },
     }
@@ -82,6 +75,11 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 CORS_ALLOW_ALL_ORIGINS = True
 
 REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "search.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_AUTHENTICATION_CLASSES": [],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
 }
@@ -100,6 +98,24 @@ CELERY_BEAT_SCHEDULE = {
     }
 }
 
+# django_ratelimit と search.ratelimit の両方の上限を切り替える。ベンチマーク時は 0 にする
+RATELIMIT_ENABLE = os.environ.get("RATELIMIT_ENABLE", "1") == "1"
+
 SEARCH_CONFIG = {
     "snippet_lines": int(os.environ.get("SEARCH_SNIPPET_LINES", "8")),
 }
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # 検索結果のプロセス内キャッシュ（短い TTL の LRU）
+    "search": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "search-results",
+        "TIMEOUT": int(os.environ.get("SEARCH_CACHE_TTL", "30")),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", "1024")),
+        },
+    },
+}
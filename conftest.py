@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from indexer.preprocess import CACHE_DIR_ENV, reset_latexpand_lookup
+
+
+@pytest.fixture(autouse=True)
+def _isolate_latexpand_cache(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> Iterator[None]:
+    # backend と indexer の両方のテストが、ホームディレクトリのキャッシュを読み書きしないようにする
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path / "cache"))
+    # shutil.which を差し替えるテストがあるので、探索結果のキャッシュも毎回捨てる
+    reset_latexpand_lookup()
+    yield
+    reset_latexpand_lookup()
@@ -9,7 +9,9 @@ from search.service import SearchService
 from search.types import IndexDocument
 
 from .fetch_samples import SampleFile, fetch_samples
-from .preprocess import preprocess_file
+from .preprocess import preprocess_file, prune_latexpand_cache
+
+_CMD_RE = re.compile(r"\\([A-Za-z]+)")
 
 
 def build_index(
@@ -25,37 +27,27 @@ def build_index(
             raise ValueError(f"Unknown source '{source}'")
 
         documents = _preprocess(fetched)
+        prune_latexpand_cache()
         service.reset_index()
         service.index_documents(documents)
         return documents
 
 
-def _normalize_command(command: str) -> str:
-    return command[1:] if command.startswith("\\") else command
-
-
-def _normalize_commands(commands: Iterable[str]) -> List[str]:
-    normalized: List[str] = []
-    seen: set[str] = set()
-    for command in commands:
-        if not command:
-            continue
-        norm = _normalize_command(command)
-        if norm in seen:
-            continue
-        seen.add(norm)
-        normalized.append(norm)
-    return normalized
+def _unique_commands(names: Iterable[str]) -> List[str]:
+    # dict は挿入順を保つので、1 パスで重複除去と順序維持ができる
+    return list(dict.fromkeys(name for name in names if name))
 
 
 def _preprocess(samples: Iterable[SampleFile]) -> List[IndexDocument]:
     documents: List[IndexDocument] = []
     for sample in samples:
         processed = preprocess_file(sample.path)
-        cmds = _normalize_commands(processed.commands or [])
-        if not cmds:
-            extracted = sorted(set(re.findall(r"\\[A-Za-z]+", processed.content)))
-            cmds = _normalize_commands(extracted)
+        cmds = list(processed.commands or [])
+        # バックスラッシュが 1 つも無ければ正規表現の走査自体を省く
+        if not cmds and "\\" in processed.content:
+            cmds = _unique_commands(
+                match.group(1) for match in _CMD_RE.finditer(processed.content)
+            )
         documents.append(
             IndexDocument(
                 file_id=sample.file_id,
@@ -40,5 +40,6 @@ def fetch_samples(target_dir: Path, *, limit: int | None = None) -> List[SampleF
 
 
 def _hash_id(prefix: str, name: str) -> str:
-    digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+    # ID 生成用途なので暗号学的強度は不要（FIPS 環境でも使えるよう明示する）
+    digest = hashlib.sha1(name.encode("utf-8"), usedforsecurity=False).hexdigest()
     return f"{prefix}:{digest}"
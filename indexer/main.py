@@ -1,13 +1,19 @@
 from __future__ import annotations
 
 import argparse
+import itertools
 import os
 import shutil
 import subprocess
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable, List
+from typing import TYPE_CHECKING, Iterable, Iterator, List
 
-from .pipeline import IndexRecord, collect_records, ensure_root
+from .pipeline import IndexRecord, ensure_root, iter_records
+
+if TYPE_CHECKING:
+    from search.types import IndexDocument
 
 
 def parse_args() -> argparse.Namespace:
@@ -30,17 +36,24 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Corpus identifier (defaults to the input directory name)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-run latexpand instead of reusing cached expansions",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
     root = ensure_root(args.input)
-    records = collect_records(root, limit=args.limit)
-
-    if not records:
+    # 前処理の結果は順に下流へ流し、全件を揃えてから送ることはしない
+    records = iter_records(root, limit=args.limit, use_cache=not args.no_cache)
+    first = next(records, None)
+    if first is None:
         print("No .tex files discovered; nothing to do")
         return
+    records = itertools.chain([first], records)
 
     if args.provider == "opensearch":
         index_with_opensearch(records)
@@ -56,31 +69,28 @@ def index_with_opensearch(records: Iterable[IndexRecord]) -> None:
     django.setup()
 
     from search.service import SearchService
+
+    # 前処理と bulk 送信を重ねたまま、新しいインデックスが完成してから切り替える。
+    # 途中のファイルで失敗しても、空や一部だけのインデックスが検索に出ることはない
+    service = SearchService()
+    service.rebuild_index(_iter_index_documents(records))
+
+
+def _iter_index_documents(records: Iterable[IndexRecord]) -> Iterator["IndexDocument"]:
     from search.types import IndexDocument
 
-    documents: List[IndexDocument] = []
     for record in records:
-        # ★ 先頭のバックスラッシュを剥がす（\iiint → iiint）
-        raw_cmds = list(record.commands or [])
-        normalized_cmds = [(c[1:] if c.startswith("\\") else c) for c in raw_cmds]
-
-        documents.append(
-            IndexDocument(
-                file_id=record.file_id,
-                path=record.path,
-                url=record.url or "",
-                year=record.year,
-                source=record.source or "samples",
-                content=record.content,
-                commands=normalized_cmds,  # ★ ここを差し替え
-                line_offsets=record.line_offsets,
-            )
+        yield IndexDocument(
+            file_id=record.file_id,
+            path=record.path,
+            url=record.url or "",
+            year=record.year,
+            source=record.source or "samples",
+            content=record.content,
+            commands=record.commands,  # preprocess 済み（\iiint → iiint）
+            line_offsets=record.line_offsets,
         )
 
-    service = SearchService()
-    service.reset_index()
-    service.index_documents(documents)
-
 
 def index_with_zoekt(
     records: Iterable[IndexRecord], *, corpus: str, root: Path
@@ -92,28 +102,53 @@ def index_with_zoekt(
     base_dir = Path("/data/repos") / corpus
     base_dir.mkdir(parents=True, exist_ok=True)
 
+    resolved = root.resolve()
     try:
-        path_key = root.resolve().relative_to(root.resolve().parent).as_posix()
+        path_key = resolved.relative_to(resolved.parent).as_posix()
     except ValueError:
-        path_key = root.resolve().name
+        path_key = resolved.name
 
     repo_dir = base_dir / path_key
     repo_dir.mkdir(parents=True, exist_ok=True)
 
-    for record in records:
-        target = repo_dir / record.path
-        target.parent.mkdir(parents=True, exist_ok=True)
-        target.write_text(record.content, encoding="utf-8")
+    # 書き込みは I/O 待ちが中心なのでスレッドで並列化する。
+    # レコードは受け取った順に流し、書き終えた本文を抱え続けないよう投入数を絞る
+    workers = min(32, (os.cpu_count() or 1) * 4)
+    created: set[Path] = set()
+    pending: deque[Future[None]] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for record in records:
+            target = repo_dir / record.path
+            # 同じディレクトリへの mkdir を繰り返さない
+            if target.parent not in created:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                created.add(target.parent)
+            if len(pending) >= workers * 2:
+                pending.popleft().result()
+            pending.append(executor.submit(_write_content, target, record.content))
+        while pending:
+            pending.popleft().result()
 
     _ensure_git_repo(repo_dir)
     _git(repo_dir, ["add", "--all"])
-    status = _git(repo_dir, ["status", "--porcelain"], capture_output=True)
-    if status.strip():
-        _git(repo_dir, ["commit", "-m", "Update index"], check=False)
+    if _has_staged_changes(repo_dir):
+        _git(repo_dir, ["commit", "--no-verify", "-m", "Update index"], check=False)
 
     subprocess.run([zoekt_index, "-incremental", str(repo_dir)], check=True)
 
 
+def _write_content(target: Path, content: str) -> None:
+    target.write_text(content, encoding="utf-8")
+
+
+def _has_staged_changes(path: Path) -> bool:
+    # diff --quiet は差分があると終了コード 1 を返すので、出力を受け取らずに判定できる
+    result = subprocess.run(
+        ["git", "diff", "--cached", "--quiet"], cwd=path, check=False
+    )
+    return result.returncode != 0
+
+
 def _ensure_git_repo(path: Path) -> None:
     if (path / ".git").exists():
         return
@@ -1,14 +1,28 @@
 from __future__ import annotations
 
 import json
+import os
+from array import array
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Iterator, List, Optional
 from typing import Union
-from .preprocess import preprocess_file
+from .preprocess import PreprocessedFile, preprocess_file, prune_latexpand_cache
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # pragma: no cover - orjson は任意
+    _json_loads = json.loads
 
 StrPath = Union[str, Path]
 
+# これ未満のファイル数ではプロセス起動のコストが勝つので直列に処理する
+PARALLEL_MIN_FILES = 4
+# 先読みはワーカーあたりこの件数まで。消費側が遅いときに結果がメモリに溜まり続けないようにする
+PREFETCH_PER_WORKER = 4
+
 
 @dataclass(slots=True)
 class IndexRecord:
@@ -19,7 +33,7 @@ class IndexRecord:
     source: Optional[str]
     commands: List[str]
     content: str
-    line_offsets: List[int]
+    line_offsets: array[int]
 
 
 def load_metadata(path: Path) -> Dict[str, dict]:
@@ -28,12 +42,12 @@ def load_metadata(path: Path) -> Dict[str, dict]:
         return {}
 
     metadata: Dict[str, dict] = {}
-    with metadata_path.open("r", encoding="utf-8") as handle:
+    # バイト列のまま渡す。前後の空白はパーサ側で読み飛ばされるので strip は不要
+    with metadata_path.open("rb") as handle:
         for line in handle:
-            line = line.strip()
-            if not line:
+            if line.isspace():
                 continue
-            data = json.loads(line)
+            data = _json_loads(line)
             file_id = data.pop("file_id", None)
             if not file_id:
                 continue
@@ -42,33 +56,84 @@ def load_metadata(path: Path) -> Dict[str, dict]:
 
 
 def discover_tex_files(root: Path) -> List[Path]:
-    return sorted(root.rglob("*.tex"))
+    # --limit の対象が実行ごとに変わらないよう、順序は従来どおり Path の順で揃える
+    return sorted(Path(path) for path in _walk_tex_files(root))
+
+
+def _walk_tex_files(root: Path) -> Iterator[str]:
+    # scandir の DirEntry は種別をキャッシュしているので、rglob より stat が少なく済む
+    stack = [os.fspath(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".tex"):
+                    yield entry.path
 
 
-def iter_records(root: Path, *, limit: int | None = None) -> Iterator[IndexRecord]:
+def iter_records(
+    root: Path,
+    *,
+    limit: int | None = None,
+    max_workers: int | None = None,
+    use_cache: bool = True,
+) -> Iterator[IndexRecord]:
     metadata = load_metadata(root)
     tex_files = discover_tex_files(root)
-    files_iter = tex_files if limit is None else tex_files[:limit]
-    for path in files_iter:
-        relative_path = path.relative_to(root).as_posix()
+    files = tex_files if limit is None else tex_files[:limit]
+    # 発見したパスはすべて root 配下なので、relative_to ではなく文字列の切り出しで相対化する
+    root_str = os.fspath(root)
+    prefix_len = 0 if root_str == "." else len(os.path.join(root_str, ""))
+    for path, processed in zip(files, _preprocess_all(files, max_workers, use_cache)):
+        relative_path = os.fspath(path)[prefix_len:]
+        if os.sep != "/":
+            relative_path = relative_path.replace(os.sep, "/")
         meta = metadata.get(relative_path, {})
-        processed = preprocess_file(path)
-        commands = processed.commands
         record = IndexRecord(
             file_id=relative_path,
             path=relative_path,
             url=meta.get("url"),
             year=meta.get("year"),
             source=meta.get("source"),
-            commands=commands,
+            commands=processed.commands,
             content=processed.content,
             line_offsets=processed.line_offsets,
         )
         yield record
+    if use_cache:
+        prune_latexpand_cache()
+
+
+def _preprocess_all(
+    paths: List[Path], max_workers: int | None, use_cache: bool
+) -> Iterator[PreprocessedFile]:
+    workers = max_workers or os.cpu_count() or 1
+    if workers <= 1 or len(paths) < PARALLEL_MIN_FILES:
+        for path in paths:
+            yield preprocess_file(path, use_cache=use_cache)
+        return
+
+    # latexpand の起動と正規表現処理はファイル単位で独立しているのでプロセスに分散する。
+    # 投入数を絞っておくと、呼び出し側がインデックス送信中でも次のファイルの処理が進む
+    window = workers * PREFETCH_PER_WORKER
+    pending: deque[Future[PreprocessedFile]] = deque()
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for path in paths:
+            if len(pending) >= window:
+                yield pending.popleft().result()
+            pending.append(executor.submit(preprocess_file, path, use_cache=use_cache))
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
 
 
-def collect_records(root: Path, *, limit: int | None = None) -> List[IndexRecord]:
-    return list(iter_records(root, limit=limit))
+def collect_records(
+    root: Path, *, limit: int | None = None, use_cache: bool = True
+) -> List[IndexRecord]:
+    return list(iter_records(root, limit=limit, use_cache=use_cache))
 
 
 def ensure_root(path: StrPath) -> Path:
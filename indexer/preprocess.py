@@ -1,17 +1,40 @@
 from __future__ import annotations
 
 import difflib
+import hashlib
+import os
 import re
 import shutil
 import subprocess
 import tempfile
+from array import array
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import List
 
+try:
+    import re2 as _command_re
+except ImportError:  # pragma: no cover - re2 は任意
+    _command_re = re
+
 
 COMMENT_PATTERN = re.compile(r"(?<!\\)%.*$", re.MULTILINE)
-COMMAND_PATTERN = re.compile(r"\\[A-Za-z@]+")
+# コメントとコマンドを 1 回の走査で拾う。先頭のバックスラッシュはインデックス側で使わないので名前だけを取り出す。
+# 3 つ目の分岐は \% などのエスケープを読み飛ばし、COMMENT_PATTERN の (?<!\\) と同じ判定を後読みなしで行う。
+# 後読みを使わないので google-re2 があれば DFA で走査できる
+TOKEN_PATTERN = _command_re.compile(
+    r"(?P<cmt>%[^\n]*)|\\(?P<cmd>[A-Za-z@]+)|\\[^A-Za-z@\\]"
+)
+# \input{file} / \include{file} に加えて、波括弧なしの \input file も拾う。
+# \includegraphics などは後ろの否定先読みで除外する
+INCLUDE_PATTERN = re.compile(
+    r"\\(?:input|include)(?![A-Za-z@])\s*(?:\{([^}]*)\}|([^\s{}%\\]+))?"
+)
+
+CACHE_DIR_ENV = "TEXGREP_CACHE_DIR"
+# latexpand キャッシュの合計サイズの上限。超えた分は使われていない順に消す
+LATEXPAND_CACHE_MAX_BYTES = 256 * 1024 * 1024
 
 
 @dataclass(slots=True)
@@ -19,21 +42,28 @@ class PreprocessedFile:
     path: Path
     content: str
     commands: List[str]
-    line_offsets: List[int]
-
-
-def preprocess_file(path: Path) -> PreprocessedFile:
-    original_text = path.read_text(encoding="utf-8")
-    original_stripped = _strip_comments(original_text)
-
-    expanded = _maybe_latexpand(path)
-    expanded_stripped = _strip_comments(expanded)
-
-    commands = sorted(set(COMMAND_PATTERN.findall(expanded_stripped)))
-
-    line_offsets = _compute_line_offsets(
-        original_stripped.splitlines(), expanded_stripped.splitlines()
-    )
+    # 行数ぶんの int オブジェクトを持たないよう、4 バイト整数の配列で保持する
+    line_offsets: array[int]
+
+
+def preprocess_file(path: Path, *, use_cache: bool = True) -> PreprocessedFile:
+    original_text = _read_text(path)
+    if "\\input" in original_text or "\\include" in original_text:
+        expanded = _maybe_latexpand(path, use_cache=use_cache, source=original_text)
+    else:
+        # 取り込み指定が無ければ latexpand を通しても本文は変わらないので、プロセス起動ごと省く
+        expanded = original_text
+    expanded_stripped, commands = _strip_comments_and_collect_commands(expanded)
+
+    if expanded == original_text:
+        # 展開で何も変わらなければ行は 1 対 1 に対応するので、再度の除去と分割を省く
+        line_count = len(expanded_stripped.splitlines())
+        line_offsets = array("i", range(1, line_count + 1))
+    else:
+        original_stripped = _strip_comments(original_text)
+        line_offsets = _compute_line_offsets(
+            original_stripped.splitlines(), expanded_stripped.splitlines()
+        )
 
     return PreprocessedFile(
         path=path,
@@ -43,49 +73,173 @@ def preprocess_file(path: Path) -> PreprocessedFile:
     )
 
 
+def _read_text(path: Path) -> str:
+    # read_text の universal newlines を通さずにバイト列から一括でデコードし、改行だけを揃える
+    with open(path, "rb") as handle:
+        return _decode_text(handle.read())
+
+
+def _decode_text(data: bytes) -> str:
+    text = data.decode("utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
 def _strip_comments(text: str) -> str:
     return COMMENT_PATTERN.sub("", text)
 
 
-def _maybe_latexpand(path: Path) -> str:
-    latexpand = shutil.which("latexpand")
+def _strip_comments_and_collect_commands(text: str) -> tuple[str, List[str]]:
+    # 出現順のまま重複を落とす。下流は順序に依存しないのでソートはしない
+    commands: dict[str, None] = {}
+    pieces: List[str] = []
+    kept_from = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        name = match.group("cmd")
+        if name is not None:
+            commands[name] = None
+        elif match.group("cmt") is not None:
+            pieces.append(text[kept_from : match.start()])
+            kept_from = match.end()
+    if not pieces:
+        return text, list(commands)
+    pieces.append(text[kept_from:])
+    return "".join(pieces), list(commands)
+
+
+def _maybe_latexpand(
+    path: Path, *, use_cache: bool = True, source: str | None = None
+) -> str:
+    # source が渡されていれば、展開しない場合の読み直しを省いてそれを返す
+    latexpand = _latexpand_path()
     if not latexpand:
-        return path.read_text(encoding="utf-8")
+        return source if source is not None else _read_text(path)
 
-    with tempfile.NamedTemporaryFile(suffix=".tex", delete=False) as tmp:
-        tmp_path = Path(tmp.name)
-    try:
-        with tmp_path.open("w", encoding="utf-8") as handle:
-            subprocess.run(
-                [latexpand, "--empty-comments", str(path)],
-                check=True,
-                stdout=handle,
-            )
-        return tmp_path.read_text(encoding="utf-8")
-    except (subprocess.CalledProcessError, OSError):
-        return path.read_text(encoding="utf-8")
-    finally:
+    cache_path = _latexpand_cache_path(path) if use_cache else None
+    if cache_path is not None and cache_path.exists():
         try:
-            tmp_path.unlink()
+            # 掃除は mtime の古い順に行うので、使ったものは新しくしておく
+            os.utime(cache_path)
         except OSError:
             pass
+        return _read_text(cache_path)
+
+    try:
+        # 一時ファイルを経由せず、パイプから直接受け取る
+        result = subprocess.run(
+            [latexpand, "--empty-comments", str(path)],
+            check=True,
+            capture_output=True,
+        )
+        expanded = _decode_text(result.stdout)
+    except (subprocess.CalledProcessError, OSError, UnicodeDecodeError):
+        return source if source is not None else _read_text(path)
+
+    if cache_path is not None:
+        _write_cache(cache_path, result.stdout)
+    return expanded
+
+
+def _write_cache(cache_path: Path, data: bytes) -> None:
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=cache_path.parent, suffix=".tmp", delete=False
+        ) as tmp:
+            tmp.write(data)
+        # 書き込み途中のファイルを読ませないよう、完成してから置き換える
+        os.replace(tmp.name, cache_path)
+    except OSError:
+        # キャッシュは最適化にすぎないので、書けなくても展開結果はそのまま使う
+        pass
+
+
+@lru_cache(maxsize=1)
+def _latexpand_path() -> str | None:
+    # PATH の走査はファイルごとに繰り返さず、プロセスごとに 1 回だけ行う
+    return shutil.which("latexpand")
+
+
+def reset_latexpand_lookup() -> None:
+    """latexpand の探索結果を捨てる。PATH を差し替えるテスト向け。"""
+    _latexpand_path.cache_clear()
+
 
+def _latexpand_cache_dir() -> Path:
+    configured = os.environ.get(CACHE_DIR_ENV)
+    if configured:
+        return Path(configured) / "latexpand"
+    return Path.home() / ".cache" / "texgrep" / "latexpand"
 
-def _compute_line_offsets(original: List[str], processed: List[str]) -> List[int]:
+
+def prune_latexpand_cache(max_bytes: int = LATEXPAND_CACHE_MAX_BYTES) -> None:
+    """latexpand キャッシュが max_bytes を超えていれば、使われていない順に消す。"""
+    entries = []
+    try:
+        with os.scandir(_latexpand_cache_dir()) as it:
+            for entry in it:
+                if entry.name.endswith(".tex") and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except OSError:
+        return
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry_path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(entry_path)
+        except OSError:
+            continue
+        total -= size
+
+
+def _latexpand_cache_path(path: Path) -> Path | None:
+    # 本文だけでなく \input / \include 先の内容も鍵に含め、取り込み先の変更で無効化する。
+    # 展開結果は中身だけで決まるので、置き場所 (build_index の一時ディレクトリなど) は鍵に含めない。
+    # 取り込み先を特定できないときは古い展開結果を返さないよう、キャッシュを使わない
+    digest = hashlib.sha256()
+    pending = [(path, "")]
+    seen: set[Path] = set()
+    while pending:
+        current, name = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        try:
+            data = current.read_bytes()
+        except OSError:
+            digest.update(b"missing:" + name.encode("utf-8"))
+            continue
+        digest.update(data)
+        text = data.decode("utf-8", errors="replace")
+        for match in INCLUDE_PATTERN.finditer(text):
+            name = (match.group(1) or match.group(2) or "").strip()
+            if not name or "\\" in name or "#" in name:
+                # \input\macro や \newcommand 内の \input{#1} など
+                return None
+            target = path.parent / name
+            if not target.suffix:
+                target = target.with_suffix(".tex")
+            pending.append((target, name))
+    return _latexpand_cache_dir() / f"{digest.hexdigest()}.tex"
+
+
+def _compute_line_offsets(original: List[str], processed: List[str]) -> array[int]:
     if not processed:
-        return []
+        return array("i")
 
+    # 取り込み先の中にも空行や \end{...} のような元ファイルと同じ行が現れるので、
+    # 貪欲な対応付けでは位置がずれる。行単位の差分で整列させる
     matcher = difflib.SequenceMatcher(None, original, processed, autojunk=False)
-    offsets = [0] * len(processed)
+    offsets = array("i", [0]) * len(processed)
     for tag, i1, i2, j1, j2 in matcher.get_opcodes():
         if tag == "equal":
-            for idx, orig_idx in enumerate(range(i1, i2), start=j1):
-                offsets[idx] = orig_idx + 1
+            offsets[j1:j2] = array("i", range(i1 + 1, i2 + 1))
         else:
-            fallback = min(i1 + 1, len(original)) if original else 1
-            if fallback <= 0:
-                fallback = 1
-            for idx in range(j1, j2):
-                offsets[idx] = fallback
+            # 挿入された行 (取り込み先の中身) は置き換えられた元の行に寄せる
+            fallback = max(min(i1 + 1, len(original)), 1)
+            offsets[j1:j2] = array("i", [fallback]) * (j2 - j1)
 
     return offsets
@@ -3,7 +3,12 @@ from __future__ import annotations
 from pathlib import Path
 
 import pytest
+import search.types as search_types
+from search.query import parse_payload
+from search.serializers import SearchResponseSerializer
+from search.service import get_inmemory_service
 
+import indexer.build_index as build_index_module
 from indexer.build_index import _preprocess, build_index
 from indexer.fetch_samples import SampleFile
 from indexer.preprocess import PreprocessedFile
@@ -41,10 +46,13 @@ def test_build_index_passes_limit_to_fetch(monkeypatch: pytest.MonkeyPatch, tmp_
         return [sample]
 
     monkeypatch.setattr("indexer.build_index.fetch_samples", _fake_fetch)
+    pruned: list[bool] = []
+    monkeypatch.setattr("indexer.build_index.prune_latexpand_cache", lambda: pruned.append(True))
 
     documents = build_index(service, source="samples", limit=1)
 
     assert captured.get("limit") == 1
+    assert pruned == [True]
     assert service.reset_called == 1
     assert service.indexed
     assert documents[0].commands
@@ -86,3 +94,35 @@ def test_build_index_arxiv_not_implemented(monkeypatch: pytest.MonkeyPatch) -> N
 
     with pytest.raises(NotImplementedError):
         build_index(service, source="arxiv")
+
+
+def test_documents_use_the_canonical_search_types(tmp_path: Path) -> None:
+    # indexer が別経路 (backend.search.types など) で types を読み込むと、同名の別クラスになって
+    # isinstance やバックエンドへの受け渡しが壊れる
+    assert build_index_module.IndexDocument is search_types.IndexDocument
+
+    sample_path = tmp_path / "sample.tex"
+    sample_path.write_text("intro\n\\Gamma appears here\n", encoding="utf-8")
+    sample = SampleFile(
+        file_id="samples:sample",
+        path=sample_path,
+        url="https://example.com/sample.tex",
+        year="2024",
+        source="samples",
+    )
+    documents = _preprocess([sample])
+    assert isinstance(documents[0], search_types.IndexDocument)
+
+    service = get_inmemory_service()
+    service.index_documents(documents)
+    response = service.search(parse_payload({"q": "\\Gamma", "mode": "literal"}))
+    payload = SearchResponseSerializer.from_response(response, took_end_to_end_ms=1)
+
+    assert payload["total"] == 1
+    hit = payload["hits"][0]
+    assert (hit["file_id"], hit["path"], hit["url"], hit["line"]) == (
+        "samples:sample",
+        str(sample_path),
+        "https://example.com/sample.tex",
+        2,
+    )
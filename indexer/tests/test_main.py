@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from indexer.main import _ensure_git_repo, _git, _has_staged_changes, index_with_opensearch
+from indexer.pipeline import IndexRecord
+
+
+def test_has_staged_changes_tracks_git_index(tmp_path: Path) -> None:
+    _ensure_git_repo(tmp_path)
+    (tmp_path / "doc.tex").write_text("\\alpha\n", encoding="utf-8")
+
+    _git(tmp_path, ["add", "--all"])
+    assert _has_staged_changes(tmp_path)
+
+    _git(tmp_path, ["commit", "--no-verify", "-q", "-m", "Update index"])
+    _git(tmp_path, ["add", "--all"])
+    assert not _has_staged_changes(tmp_path)
+
+
+def test_index_with_opensearch_keeps_index_when_preprocessing_fails(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: list[str] = []
+
+    class FakeService:
+        def reset_index(self) -> None:
+            calls.append("reset")
+
+        def rebuild_index(self, documents) -> None:  # type: ignore[no-untyped-def]
+            for document in documents:
+                calls.append(document.file_id)
+            calls.append("swap")
+
+    monkeypatch.setattr("search.service.SearchService", FakeService)
+
+    def records() -> Iterator[IndexRecord]:
+        yield IndexRecord(
+            file_id="a.tex",
+            path="a.tex",
+            url=None,
+            year=None,
+            source=None,
+            commands=[],
+            content="\\alpha",
+            line_offsets=array("i", [1]),
+        )
+        raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+
+    with pytest.raises(UnicodeDecodeError):
+        index_with_opensearch(records())
+
+    # ドキュメントは前処理と並行して流れるが、失敗したので切り替えまでは進まない
+    assert calls == ["a.tex"]
@@ -5,7 +5,13 @@ from pathlib import Path
 
 import pytest
 
-from indexer.pipeline import collect_records, ensure_root, iter_records
+from indexer.pipeline import (
+    collect_records,
+    discover_tex_files,
+    ensure_root,
+    iter_records,
+    load_metadata,
+)
 
 
 def test_collect_records_from_empty_directory(tmp_path: Path) -> None:
@@ -43,7 +49,7 @@ def test_iter_records_uses_metadata_and_limit(tmp_path: Path) -> None:
     assert record.url == "https://example.com/first"
     assert record.year == "2023"
     assert record.source == "custom"
-    assert "\\alpha" in record.commands
+    assert "alpha" in record.commands
 
 
 def test_ensure_root_raises_for_missing_directory(tmp_path: Path) -> None:
@@ -59,3 +65,53 @@ def test_ensure_root_raises_for_file_path(tmp_path: Path) -> None:
 
     with pytest.raises(NotADirectoryError):
         ensure_root(file_path)
+
+
+def test_iter_records_parallel_matches_serial(tmp_path: Path) -> None:
+    for index in range(10):
+        (tmp_path / f"doc{index}.tex").write_text(
+            f"\\section{{S{index}}}\n\\alpha % comment\n", encoding="utf-8"
+        )
+
+    serial = list(iter_records(tmp_path, max_workers=1))
+    parallel = list(iter_records(tmp_path, max_workers=2))
+
+    assert [record.path for record in parallel] == [f"doc{index}.tex" for index in range(10)]
+    assert parallel == serial
+
+
+def test_discover_tex_files_walks_nested_directories_in_path_order(tmp_path: Path) -> None:
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "deep").mkdir()
+    for relative in ["a-b.tex", "a/b.tex", "a/deep/c.tex", "a/notes.txt", "z.tex"]:
+        (tmp_path / relative).write_text("x", encoding="utf-8")
+
+    found = [path.relative_to(tmp_path).as_posix() for path in discover_tex_files(tmp_path)]
+
+    assert found == ["a/b.tex", "a/deep/c.tex", "a-b.tex", "z.tex"]
+
+
+def test_load_metadata_skips_blank_lines(tmp_path: Path) -> None:
+    (tmp_path / "metadata.jsonl").write_bytes(
+        b'{"file_id": "a.tex", "year": "2024"}\r\n'
+        b"\n"
+        b"   \n"
+        b'  {"file_id": "b.tex", "url": "https://example.com/b"}  '
+    )
+
+    assert load_metadata(tmp_path) == {
+        "a.tex": {"year": "2024"},
+        "b.tex": {"url": "https://example.com/b"},
+    }
+
+
+def test_iter_records_relative_paths_for_relative_root(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "corpus" / "sub").mkdir(parents=True)
+    (tmp_path / "corpus" / "sub" / "doc.tex").write_text("\\alpha\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    assert [record.path for record in iter_records(Path("corpus"))] == ["sub/doc.tex"]
+    monkeypatch.chdir(tmp_path / "corpus")
+    assert [record.path for record in iter_records(Path("."))] == ["sub/doc.tex"]
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import os
+import re
 from pathlib import Path
 
 import subprocess
@@ -23,7 +25,7 @@ def test_preprocess_file_extracts_commands_and_offsets(tmp_path: Path) -> None:
 
     processed = preprocess_file(path)
 
-    assert processed.commands == ["\\alpha", "\\beta"]
+    assert processed.commands == ["alpha", "beta"]
     assert processed.content.splitlines() == [
         "",
         "\\alpha",
@@ -31,14 +33,14 @@ def test_preprocess_file_extracts_commands_and_offsets(tmp_path: Path) -> None:
         "\t\\beta",
         "text line",
     ]
-    assert processed.line_offsets == [1, 2, 3, 4, 5]
+    assert list(processed.line_offsets) == [1, 2, 3, 4, 5]
 
 
 def test_compute_line_offsets_handles_insertions() -> None:
     original = ["one", "two"]
     processed = ["inserted", "one", "two"]
     offsets = _compute_line_offsets(original, processed)
-    assert offsets == [1, 1, 2]
+    assert list(offsets) == [1, 1, 2]
 
 
 def test_maybe_latexpand_skips_when_tool_missing(
@@ -70,3 +72,208 @@ def test_maybe_latexpand_falls_back_on_error(
 
     expanded = _maybe_latexpand(path)
     assert expanded == content
+
+
+def test_compute_line_offsets_maps_expanded_include_around_blank_lines() -> None:
+    original = ["a", "\\input{x}", "b", "", "c"]
+    processed = ["a", "x1", "", "x2", "b", "", "c"]
+    offsets = _compute_line_offsets(original, processed)
+    assert list(offsets) == [1, 2, 2, 2, 3, 4, 5]
+
+
+def test_compute_line_offsets_keeps_adjacent_includes_apart() -> None:
+    original = [
+        "\\section{Intro}",
+        "\\input{intro}",
+        "\\section{Method}",
+        "\\input{method}",
+        "\\end{document}",
+    ]
+    processed = [
+        "\\section{Intro}",
+        "intro 1",
+        "intro 2",
+        "\\section{Method}",
+        "method 1",
+        "method 2",
+        "\\end{document}",
+    ]
+    offsets = _compute_line_offsets(original, processed)
+    assert list(offsets) == [1, 2, 2, 3, 4, 4, 5]
+
+
+def test_maybe_latexpand_reuses_cached_expansion(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    path = tmp_path / "main.tex"
+    path.write_text("\\input{part}\n", encoding="utf-8")
+    part = tmp_path / "part.tex"
+    part.write_text("first\n", encoding="utf-8")
+
+    monkeypatch.setattr(preprocess.shutil, "which", lambda _name: "/usr/bin/latexpand")
+    calls: list[list[str]] = []
+
+    def _fake_run(args, check, capture_output):  # type: ignore[no-untyped-def]
+        calls.append(args)
+        return subprocess.CompletedProcess(args, 0, stdout=part.read_bytes(), stderr=b"")
+
+    monkeypatch.setattr(preprocess.subprocess, "run", _fake_run)
+
+    assert _maybe_latexpand(path) == "first\n"
+    assert _maybe_latexpand(path) == "first\n"
+    assert len(calls) == 1
+
+    part.write_text("second\n", encoding="utf-8")
+    assert _maybe_latexpand(path) == "second\n"
+    assert _maybe_latexpand(path, use_cache=False) == "second\n"
+    assert len(calls) == 3
+
+
+def test_latexpand_cache_tracks_braceless_input(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    path = tmp_path / "main.tex"
+    path.write_text("\\input part\n", encoding="utf-8")
+    part = tmp_path / "part.tex"
+    part.write_text("first\n", encoding="utf-8")
+
+    monkeypatch.setattr(preprocess.shutil, "which", lambda _name: "/usr/bin/latexpand")
+
+    def _fake_run(args, check, capture_output):  # type: ignore[no-untyped-def]
+        return subprocess.CompletedProcess(args, 0, stdout=part.read_bytes(), stderr=b"")
+
+    monkeypatch.setattr(preprocess.subprocess, "run", _fake_run)
+
+    assert _maybe_latexpand(path) == "first\n"
+    part.write_text("second\n", encoding="utf-8")
+    assert _maybe_latexpand(path) == "second\n"
+
+
+def test_latexpand_cache_is_skipped_for_unresolvable_includes(tmp_path: Path) -> None:
+    path = tmp_path / "main.tex"
+    path.write_text("\\newcommand{\\chapterfile}[1]{\\input{#1}}\n", encoding="utf-8")
+    assert preprocess._latexpand_cache_path(path) is None
+
+    path.write_text("\\input\\partname\n", encoding="utf-8")
+    assert preprocess._latexpand_cache_path(path) is None
+
+    path.write_text("\\includegraphics{figure}\n", encoding="utf-8")
+    assert preprocess._latexpand_cache_path(path) is not None
+
+
+def test_latexpand_cache_key_ignores_location(tmp_path: Path) -> None:
+    paths = []
+    for run in ("run1", "run2"):
+        workspace = tmp_path / run
+        workspace.mkdir()
+        (workspace / "main.tex").write_text("\\input{part}\n", encoding="utf-8")
+        (workspace / "part.tex").write_text("body\n", encoding="utf-8")
+        paths.append(preprocess._latexpand_cache_path(workspace / "main.tex"))
+
+    assert paths[0] is not None
+    assert paths[0] == paths[1]
+
+    (tmp_path / "run2" / "part.tex").write_text("changed\n", encoding="utf-8")
+    assert preprocess._latexpand_cache_path(tmp_path / "run2" / "main.tex") != paths[0]
+
+
+def test_prune_latexpand_cache_drops_least_recently_used(tmp_path: Path) -> None:
+    cache_dir = preprocess._latexpand_cache_dir()
+    cache_dir.mkdir(parents=True)
+    for index, name in enumerate(["old", "mid", "new"]):
+        entry = cache_dir / f"{name}.tex"
+        entry.write_bytes(b"x" * 10)
+        os.utime(entry, (1_000 + index, 1_000 + index))
+
+    preprocess.prune_latexpand_cache(max_bytes=20)
+
+    assert sorted(entry.name for entry in cache_dir.iterdir()) == ["mid.tex", "new.tex"]
+
+
+def test_preprocess_file_reads_source_once_without_latexpand(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    path = tmp_path / "doc.tex"
+    path.write_text("\\alpha\n", encoding="utf-8")
+    monkeypatch.setattr(preprocess.shutil, "which", lambda _name: None)
+
+    reads: list[Path] = []
+    original_read = preprocess._read_text
+
+    def _counting_read(target: Path) -> str:
+        reads.append(target)
+        return original_read(target)
+
+    monkeypatch.setattr(preprocess, "_read_text", _counting_read)
+
+    processed = preprocess_file(path)
+
+    assert processed.commands == ["alpha"]
+    assert reads == [path]
+
+
+def test_preprocess_file_keeps_commands_in_first_occurrence_order(tmp_path: Path) -> None:
+    path = tmp_path / "order.tex"
+    path.write_text("\\zeta \\alpha \\zeta \\beta \\alpha\n", encoding="utf-8")
+
+    processed = preprocess_file(path)
+
+    assert processed.commands == ["zeta", "alpha", "beta"]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "\\alpha % \\hidden\n\\beta",
+        "50\\% of \\gamma\n",
+        "line break \\\\% \\hidden\n\\delta",
+        "\\\\\\% kept \\epsilon\n",
+        "\\{\\zeta\\}%\n%only comment\n\\@internal",
+        "no commands here\n",
+    ],
+)
+def test_single_pass_scan_matches_separate_strip_and_findall(text: str) -> None:
+    stripped, commands = preprocess._strip_comments_and_collect_commands(text)
+
+    expected_stripped = preprocess._strip_comments(text)
+    expected_commands = list(dict.fromkeys(re.findall(r"\\([A-Za-z@]+)", expected_stripped)))
+    assert stripped == expected_stripped
+    assert commands == expected_commands
+
+
+def test_preprocess_file_runs_latexpand_only_for_files_with_includes(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    plain = tmp_path / "plain.tex"
+    plain.write_text("\\alpha\n", encoding="utf-8")
+    main = tmp_path / "main.tex"
+    main.write_text("\\input{part}\n", encoding="utf-8")
+
+    monkeypatch.setattr(preprocess.shutil, "which", lambda _name: "/usr/bin/latexpand")
+    calls: list[list[str]] = []
+
+    def _fake_run(args, check, capture_output):  # type: ignore[no-untyped-def]
+        calls.append(args)
+        return subprocess.CompletedProcess(args, 0, stdout=b"\\beta\n", stderr=b"")
+
+    monkeypatch.setattr(preprocess.subprocess, "run", _fake_run)
+
+    assert preprocess_file(plain).commands == ["alpha"]
+    assert calls == []
+
+    assert preprocess_file(main).commands == ["beta"]
+    assert len(calls) == 1
+
+
+def test_latexpand_lookup_is_cached_per_process(monkeypatch: pytest.MonkeyPatch) -> None:
+    lookups: list[str] = []
+
+    def _which(name: str) -> None:
+        lookups.append(name)
+        return None
+
+    monkeypatch.setattr(preprocess.shutil, "which", _which)
+
+    assert preprocess._latexpand_path() is None
+    assert preprocess._latexpand_path() is None
+    assert lookups == ["latexpand"]
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from scripts.bench_local import (
+    ADVERSARIAL_LABEL,
+    DEFAULT_WARMUP_MAX,
+    LatencyHistogram,
+    _build_payloads,
+    _bucket_us,
+    _is_regex_rejection,
+    _mark_request_sent,
+    _mark_response_headers,
+    _run_async,
+    _run_payloads,
+    _seed_pool,
+    _warmup_payloads,
+)
+
+SERVER_DELAY_S = 0.03
+
+
+@pytest.mark.parametrize(
+    ("value_ms", "expected_us"),
+    [
+        (0.0, 0),
+        (-0.5, 0),
+        (0.999, 999),
+        (1.0, 1000),
+        (1.0004, 1000),
+        (47.94, 47900),
+        (47.96, 48000),
+        (123456.7, 123000000),
+    ],
+)
+def test_bucket_us_keeps_three_significant_figures(value_ms: float, expected_us: int) -> None:
+    assert _bucket_us(value_ms) == expected_us
+
+
+def test_histogram_percentiles_use_nearest_rank() -> None:
+    histogram = LatencyHistogram()
+    for value in range(1, 101):
+        histogram.record(float(value))
+
+    assert len(histogram) == 100
+    assert histogram.percentiles((0.0, 0.5, 0.95, 0.99, 1.0)) == [1.0, 50.0, 95.0, 99.0, 100.0]
+
+
+def test_histogram_percentiles_do_not_interpolate() -> None:
+    histogram = LatencyHistogram()
+    histogram.record(1.0)
+    histogram.record(9.0)
+
+    # 線形補間なら 5.0 になるが、実際に観測した値を返す
+    assert histogram.percentiles((0.5,)) == [1.0]
+
+
+def test_histogram_merge_combines_counts() -> None:
+    first = LatencyHistogram()
+    second = LatencyHistogram()
+    for value in (1.0, 2.0, 3.0):
+        first.record(value)
+    for value in (3.0, 40.0):
+        second.record(value)
+
+    first.merge(second)
+
+    assert len(first) == 5
+    assert first.counts[3000] == 2
+    assert first.percentiles((0.5, 1.0)) == [3.0, 40.0]
+
+
+def test_empty_histogram_has_no_percentiles() -> None:
+    histogram = LatencyHistogram()
+
+    assert len(histogram) == 0
+    assert histogram.percentiles((0.5, 0.95)) == [None, None]
+
+
+@pytest.mark.parametrize(
+    ("status_code", "body", "expected"),
+    [
+        (400, {"message": "Invalid search request", "code": "invalid_request", "errors": {"q": ["x"]}}, True),
+        (400, {"message": "regex is only supported with Zoekt", "code": "invalid_request"}, False),
+        (429, {"detail": "Too many requests"}, False),
+        (403, {"detail": "Forbidden"}, False),
+    ],
+)
+def test_only_validation_errors_count_as_regex_rejections(status_code: int, body: dict, expected: bool) -> None:
+    response = httpx.Response(status_code, json=body)
+
+    assert _is_regex_rejection(response) is expected
+
+
+@pytest.mark.parametrize("provider", [None, "zoekt"])
+def test_default_warmup_is_one_capped_pass(provider: str | None) -> None:
+    payloads = _warmup_payloads(provider, None)
+
+    assert len(payloads) == min(len(_seed_pool(provider)), DEFAULT_WARMUP_MAX)
+    assert len({body for _, _, body in payloads}) == len(payloads)
+    assert len(_warmup_payloads(provider, 3)) == 3
+
+
+def _slow_client() -> httpx.AsyncClient:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(SERVER_DELAY_S)
+        return httpx.Response(200, json={"took_end_to_end_ms": 1})
+
+    return httpx.AsyncClient(
+        base_url="http://bench.test",
+        transport=httpx.MockTransport(handler),
+        event_hooks={"request": [_mark_request_sent], "response": [_mark_response_headers]},
+    )
+
+
+def _max_ms(histogram: LatencyHistogram) -> float:
+    (value,) = histogram.percentiles((1.0,))
+    assert value is not None
+    return value
+
+
+def test_open_loop_records_queue_wait_apart_from_send() -> None:
+    payloads = _build_payloads(random.Random(0), 5, None)
+
+    async def run():  # type: ignore[no-untyped-def]
+        async with _slow_client() as client:
+            return await _run_payloads(client, payloads, concurrency=1, target_rps=1000.0)
+
+    samples = _run_async(run())
+
+    assert not samples.errors
+    assert len(samples.client_ms) == 5
+    # 1 枠を 5 件で取り合うので、最後の 1 件は先行 4 件ぶん待ってから送られる
+    queue_ms = _max_ms(samples.phase_ms["queue"])
+    assert queue_ms >= 3 * SERVER_DELAY_S * 1000
+    assert _max_ms(samples.phase_ms["send"]) < SERVER_DELAY_S * 1000
+    assert _max_ms(samples.phase_ms["client"]) < SERVER_DELAY_S * 1000
+    # 往復時間は予定時刻から測るので、待ち時間を含む
+    assert _max_ms(samples.client_ms) >= queue_ms + SERVER_DELAY_S * 1000 / 2
+
+
+def test_closed_loop_has_no_queue_wait() -> None:
+    payloads = _build_payloads(random.Random(0), 3, None)
+
+    async def run():  # type: ignore[no-untyped-def]
+        async with _slow_client() as client:
+            return await _run_payloads(client, payloads, concurrency=1)
+
+    samples = _run_async(run())
+
+    assert _max_ms(samples.phase_ms["queue"]) == 0.0
+
+
+def test_build_payloads_is_deterministic_per_seed() -> None:
+    first = _build_payloads(random.Random(7), 200, "zoekt", adversarial=True)
+    second = _build_payloads(random.Random(7), 200, "zoekt", adversarial=True)
+    other = _build_payloads(random.Random(8), 200, "zoekt", adversarial=True)
+
+    assert first == second
+    assert first != other
+    assert any(label == ADVERSARIAL_LABEL for label, _, _ in first)
+    # 同じクエリはエンコード済みのバイト列を共有する
+    by_body = {prepared[2]: prepared for prepared in first}
+    assert all(prepared is by_body[prepared[2]] for prepared in first)